@@ -0,0 +1,179 @@
+"""Compare per-bet commits with group-committed bet batches.
+
+    python -m bench.betbatch --bettors 500 --bets 5000 --windows 0.001,0.005,0.02
+
+Like bench.lifecycle this drops and recreates every table in BENCH_DB_NAME
+(or --db-name), once per run. Each run places the same --bets bets from
+--concurrency concurrent bettors, first through BetManager.place and then
+through a BetBatcher for every batch window.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import insert, select
+
+from bench.lifecycle import percentile
+from util import Database
+from util.batcher import BetBatcher
+from util.models import Account, Poll, PollOption, PollStatus
+
+GUILD_ID = 1
+
+
+async def seed(db: Database, args: argparse.Namespace) -> List[int]:
+    now = datetime.now(timezone.utc)
+    async with db.async_session() as session:
+        await session.execute(
+            insert(Account),
+            [
+                {
+                    "guild_id": GUILD_ID,
+                    "account_number": n,
+                    "name": f"user{n}",
+                    "snapshot_balance": args.stake * args.bets,
+                }
+                for n in range(args.bettors)
+            ],
+        )
+        account_id = (await session.execute(select(Account.id).limit(1))).scalar_one()
+        await session.execute(
+            insert(Poll),
+            [
+                {
+                    "account_id": account_id,
+                    "status": PollStatus.OPEN,
+                    "question": f"benchmark poll {n}",
+                    "created_on": now,
+                    "lockin_by": now + timedelta(hours=1),
+                    "reference": f"https://discord.com/channels/{GUILD_ID}/1/{n}",
+                    "guild_id": GUILD_ID,
+                    "channel_id": 1,
+                    "message_id": n,
+                }
+                for n in range(args.polls)
+            ],
+        )
+        poll_ids = (await session.execute(select(Poll.id))).scalars().all()
+        await session.execute(
+            insert(PollOption),
+            [
+                {"poll_id": poll_id, "index": index, "value": f"option {index}"}
+                for poll_id in poll_ids
+                for index in range(1, args.options + 1)
+            ],
+        )
+        await session.commit()
+    return poll_ids
+
+
+async def run_once(
+    args: argparse.Namespace, window: Optional[float]
+) -> Dict[str, float]:
+    db = Database.from_env(db_name=args.db_name)
+    await db.drop_tables()
+    await db.create_tables()
+    poll_ids = await seed(db, args)
+
+    async with db.async_session() as session:
+        polls = [await db.polls.get_view(session, GUILD_ID, id) for id in poll_ids]
+    options = [option for poll in polls for option in poll.options]
+    batcher = None
+    if window is not None:
+        batcher = BetBatcher(db, window=window, max_batch=args.max_batch)
+
+    rnd = random.Random(args.seed)
+    bets = [
+        (rnd.randrange(args.bettors), rnd.choice(options)) for _ in range(args.bets)
+    ]
+    queue = asyncio.Queue()
+    for bet in bets:
+        queue.put_nowait(bet)
+    latencies: List[float] = []
+    rejected = 0
+
+    async def bettor() -> None:
+        nonlocal rejected
+        while not queue.empty():
+            account_number, option = queue.get_nowait()
+            start = perf_counter()
+            async with db.async_session() as session:
+                account = await db.accounts.get_or_create(
+                    session,
+                    guild_id=GUILD_ID,
+                    account_number=account_number,
+                    name=f"user{account_number}",
+                )
+                if batcher is None:
+                    balance = await db.bets.place(
+                        session, account=account, option=option, stake=args.stake
+                    )
+            if batcher is not None:
+                balance = await batcher.place(account, option, args.stake)
+            latencies.append(perf_counter() - start)
+            rejected += balance is None
+
+    commits = db.stats.totals()["commits"]
+    start = perf_counter()
+    await asyncio.gather(*(bettor() for _ in range(args.concurrency)))
+    elapsed = perf_counter() - start
+    commits = db.stats.totals()["commits"] - commits
+    await db.dispose()
+
+    return {
+        "bets_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "commits_per_bet": commits / len(latencies),
+        "rejected": rejected,
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    modes = [("per-bet", None)] + [
+        (f"{float(window) * 1000:g}ms", float(window))
+        for window in args.windows.split(",")
+    ]
+
+    print(
+        f"{'mode':<10} {'bets/s':>9} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} "
+        f"{'c/bet':>6} {'rej':>5}"
+    )
+    for name, window in modes:
+        row = await run_once(args, window)
+        print(
+            f"{name:<10} {row['bets_per_s']:>9.1f} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+            f"{row['commits_per_bet']:>6.2f} {row['rejected']:>5}"
+        )
+
+
+def main() -> None:
+    load_dotenv(override=True)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bettors", type=int, default=500)
+    parser.add_argument("--polls", type=int, default=10)
+    parser.add_argument("--options", type=int, default=4, help="options per poll")
+    parser.add_argument("--bets", type=int, default=5000)
+    parser.add_argument("--stake", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--windows", default="0.001,0.005,0.02", help="batch windows in seconds"
+    )
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--db-name", default=os.getenv("BENCH_DB_NAME", "marketbot_bench")
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
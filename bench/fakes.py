@@ -0,0 +1,102 @@
+import itertools
+from typing import Dict, List, Optional
+import discord
+
+_snowflakes = itertools.count(1 << 40)
+
+
+def snowflake() -> int:
+    return next(_snowflakes)
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeChannel", embed: Optional[discord.Embed] = None):
+        self.id = snowflake()
+        self.channel = channel
+        self.embeds: List[discord.Embed] = [embed] if embed else []
+        self.jump_url = (
+            f"https://discord.com/channels/{channel.guild_id}/{channel.id}/{self.id}"
+        )
+
+    async def edit(self, *, embed: Optional[discord.Embed] = None, **kwargs):
+        self.channel.calls["edit"] += 1
+        if embed is not None:
+            self.embeds = [embed]
+        return self
+
+
+class FakeChannel:
+    """Stands in for a guild text channel and counts the REST calls made on it."""
+
+    def __init__(self, guild_id: int):
+        self.id = snowflake()
+        self.guild_id = guild_id
+        self.messages: Dict[int, FakeMessage] = {}
+        self.calls = {"send": 0, "edit": 0, "fetch": 0}
+
+    async def send(self, content=None, *, embed=None, **kwargs) -> FakeMessage:
+        self.calls["send"] += 1
+        message = FakeMessage(self, embed)
+        self.messages[message.id] = message
+        return message
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        self.calls["fetch"] += 1
+        return self.messages[message_id]
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        return self.messages[message_id]
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+        channel = self._interaction.channel
+        message = FakeMessage(channel)
+        channel.messages[message.id] = message
+        self._interaction._original = message
+
+    async def send_message(self, content=None, *, embed=None, **kwargs):
+        self._done = True
+        self._interaction.responses.append((content, embed))
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content=None, *, embed=None, **kwargs) -> FakeMessage:
+        message = self._interaction._original
+        message.embeds = [embed] if embed else []
+        return message
+
+
+class FakeInteraction:
+    def __init__(self, channel: FakeChannel, user: FakeUser):
+        self.channel = channel
+        self.channel_id = channel.id
+        self.guild_id = channel.guild_id
+        self.user = user
+        self.extras = {}
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.responses = []
+        self._original: Optional[FakeMessage] = None
+
+    async def original_response(self) -> FakeMessage:
+        return self._original
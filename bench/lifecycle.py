@@ -0,0 +1,341 @@
+"""Drive the poll lifecycle through the cogs against a local database.
+
+    python -m bench.lifecycle --guilds 2 --polls 5 --options 4 --bettors 200
+
+Every table in the target database is dropped and recreated, so point
+BENCH_DB_NAME (or --db-name) at a scratch database. The remaining DB_*
+settings are read from the environment like the bot does.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Callable, Dict, List
+
+import discord
+from dotenv import load_dotenv
+from sqlalchemy import update
+
+from bench.fakes import FakeChannel, FakeInteraction, FakeUser, snowflake
+from bot import MarketBot
+from cogs.account import AccountCog
+from cogs.poll import PollCog
+from util import Database
+from util.models import Poll, PollStatus
+from util.transformers import Duration, Options
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Phase:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.elapsed = 0.0
+        self.statements = 0
+        self.commits = 0
+        self.rest_calls = 0
+
+    def report(self) -> Dict[str, float]:
+        count = len(self.latencies)
+        return {
+            "count": count,
+            "errors": sum(self.errors.values()),
+            "error_types": dict(self.errors),
+            "throughput": count / self.elapsed if self.elapsed else 0.0,
+            "p50_ms": percentile(self.latencies, 0.50) * 1000,
+            "p95_ms": percentile(self.latencies, 0.95) * 1000,
+            "p99_ms": percentile(self.latencies, 0.99) * 1000,
+            "queries_per_op": self.statements / count if count else 0.0,
+            "commits_per_op": self.commits / count if count else 0.0,
+            "rest_per_op": self.rest_calls / count if count else 0.0,
+        }
+
+
+class Lifecycle:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.channels: Dict[int, FakeChannel] = {}
+        self.phases: Dict[str, Phase] = {}
+
+    async def setup(self) -> None:
+        self.bot = MarketBot(command_prefix="!", intents=discord.Intents.none())
+        await self.bot.db.dispose()
+        self.bot.db = Database.from_env(db_name=self.args.db_name)
+        self.bot.get_partial_messageable = self.partial_messageable
+
+        await self.bot.db.drop_tables()
+        await self.bot.db.create_tables()
+
+        self.polls = PollCog(self.bot)
+        self.accounts = AccountCog(self.bot)
+
+        self.guilds = []
+        for _ in range(self.args.guilds):
+            channel = FakeChannel(snowflake())
+            self.channels[channel.id] = channel
+            owner = FakeUser(snowflake())
+            bettors = [FakeUser(snowflake()) for _ in range(self.args.bettors)]
+            self.guilds.append({"channel": channel, "owner": owner, "bettors": bettors})
+
+    def partial_messageable(self, channel_id: int, **kwargs) -> FakeChannel:
+        return self.channels[channel_id]
+
+    async def drain(self) -> None:
+        await self.bot.poll_embeds.wait_idle()
+        await self.bot.outbox.wait_idle()
+
+    def rest_calls(self) -> int:
+        return sum(sum(channel.calls.values()) for channel in self.channels.values())
+
+    async def run_phase(self, name: str, jobs: List[Callable]) -> None:
+        phase = self.phases.setdefault(name, Phase(name))
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def timed(job):
+            async with semaphore:
+                start = perf_counter()
+                try:
+                    await job()
+                except Exception as error:
+                    phase.errors[type(error).__name__] += 1
+                phase.latencies.append(perf_counter() - start)
+
+        before = self.bot.db.stats.totals()
+        rest_before = self.rest_calls()
+        start = perf_counter()
+        await asyncio.gather(*(timed(job) for job in jobs))
+        phase.elapsed += perf_counter() - start
+        after = self.bot.db.stats.totals()
+        phase.statements += after["statements"] - before["statements"]
+        phase.commits += after["commits"] - before["commits"]
+        phase.rest_calls += self.rest_calls() - rest_before
+
+    async def run_lock_phase(self, poll_ids: List[int]) -> None:
+        """Lock every poll through the bot's own poll_status_checker.
+
+        The polls' deadlines are moved ``--lock-delay`` seconds ahead before
+        the checker starts, so it schedules them from the database as it does
+        at startup. Each lock is timed from that deadline.
+        """
+        phase = self.phases.setdefault("poll lock", Phase("poll lock"))
+        pending = set(poll_ids)
+        all_locked = asyncio.Event()
+        lock_poll = self.bot.lock_poll
+
+        async def timed_lock_poll(session, poll_id, **kwargs):
+            await lock_poll(session, poll_id, **kwargs)
+            phase.latencies.append(perf_counter() - deadline)
+            pending.discard(poll_id)
+            if not pending:
+                all_locked.set()
+
+        async def ready():
+            pass
+
+        self.bot.lock_poll = timed_lock_poll
+        self.bot.wait_until_ready = ready
+
+        lockin_by = datetime.now(timezone.utc) + timedelta(seconds=self.args.lock_delay)
+        deadline = perf_counter() + self.args.lock_delay
+        async with self.bot.db.async_session() as session:
+            await session.execute(
+                update(Poll.__table__)
+                .where(Poll.id.in_(poll_ids))
+                .values(lockin_by=lockin_by)
+            )
+            await session.commit()
+
+        before = self.bot.db.stats.totals()
+        rest_before = self.rest_calls()
+        checker = asyncio.create_task(self.bot.poll_status_checker())
+        try:
+            await asyncio.wait_for(all_locked.wait(), self.args.lock_delay + 60)
+        finally:
+            checker.cancel()
+        phase.elapsed += perf_counter() - deadline
+        after = self.bot.db.stats.totals()
+        phase.statements += after["statements"] - before["statements"]
+        phase.commits += after["commits"] - before["commits"]
+        phase.rest_calls += self.rest_calls() - rest_before
+
+    def interaction(self, guild: dict, user: FakeUser) -> FakeInteraction:
+        return FakeInteraction(guild["channel"], user)
+
+    async def run(self) -> Dict[str, Dict[str, float]]:
+        await self.setup()
+        args = self.args
+        options = Options([f"option {i + 1}" for i in range(args.options)])
+        members = [
+            (guild, user)
+            for guild in self.guilds
+            for user in [guild["owner"], *guild["bettors"]]
+        ]
+
+        await self.run_phase(
+            "register",
+            [
+                lambda guild=guild, user=user: self.accounts.balance.callback(
+                    self.accounts, self.interaction(guild, user)
+                )
+                for guild, user in members
+            ],
+        )
+
+        await self.run_phase(
+            "poll create",
+            [
+                lambda guild=guild, n=n: self.polls.create.callback(
+                    self.polls,
+                    self.interaction(guild, guild["owner"]),
+                    f"benchmark poll {n}",
+                    Duration(timedelta(hours=1)),
+                    options,
+                )
+                for guild in self.guilds
+                for n in range(args.polls)
+            ],
+        )
+
+        async with self.bot.db.async_session() as session:
+            polls = await self.bot.db.polls.get_all(session, status=PollStatus.OPEN)
+        poll_ids = sorted(poll.id for poll in polls)
+        guild_polls = {
+            guild["channel"].guild_id: [
+                poll.id for poll in polls if poll.guild_id == guild["channel"].guild_id
+            ]
+            for guild in self.guilds
+        }
+
+        await self.run_phase(
+            "poll bet",
+            [
+                lambda guild=guild, bettor=bettor, poll_id=poll_id: (
+                    self.polls.bet.callback(
+                        self.polls,
+                        self.interaction(guild, bettor),
+                        poll_id,
+                        self.random.randint(1, args.options),
+                        args.stake,
+                    )
+                )
+                for guild in self.guilds
+                for poll_id in guild_polls[guild["channel"].guild_id]
+                for bettor in guild["bettors"]
+            ],
+        )
+        await self.run_phase("embed flush", [self.drain])
+
+        await self.run_phase(
+            "balance",
+            [
+                lambda guild=guild, bettor=bettor: self.accounts.balance.callback(
+                    self.accounts, self.interaction(guild, bettor)
+                )
+                for guild in self.guilds
+                for bettor in guild["bettors"]
+            ],
+        )
+
+        await self.run_lock_phase(poll_ids)
+        await self.run_phase("outbox flush", [self.drain])
+
+        await self.run_phase(
+            "poll close",
+            [
+                lambda guild=guild, poll_id=poll_id: self.polls.close.callback(
+                    self.polls,
+                    self.interaction(guild, guild["owner"]),
+                    poll_id,
+                    1,
+                )
+                for guild in self.guilds
+                for poll_id in guild_polls[guild["channel"].guild_id]
+            ],
+        )
+        await self.run_phase("outbox flush", [self.drain])
+
+        await self.bot.outbox.close()
+        await self.bot.db.dispose()
+        return {name: phase.report() for name, phase in self.phases.items()}
+
+
+def print_report(results: Dict[str, Dict[str, float]], baseline: Dict = None) -> None:
+    header = (
+        f"{'phase':<12} {'ops':>6} {'err':>4} {'ops/s':>9} {'p50ms':>8} "
+        f"{'p95ms':>8} {'p99ms':>8} {'q/op':>6} {'c/op':>6} {'rest/op':>7}"
+    )
+    print(header)
+    for name, row in results.items():
+        print(
+            f"{name:<12} {row['count']:>6} {row['errors']:>4} "
+            f"{row['throughput']:>9.1f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+            f"{row['p99_ms']:>8.2f} {row['queries_per_op']:>6.2f} "
+            f"{row['commits_per_op']:>6.2f} {row['rest_per_op']:>7.2f}"
+        )
+        if row["errors"]:
+            print(f"{'  errors':<12} {row['error_types']}")
+        if baseline and name in baseline:
+            base = baseline[name]
+            print(
+                f"{'  vs base':<12} {'':>6} {'':>4} "
+                f"{row['throughput'] - base['throughput']:>+9.1f} "
+                f"{row['p50_ms'] - base['p50_ms']:>+8.2f} "
+                f"{row['p95_ms'] - base['p95_ms']:>+8.2f} "
+                f"{row['p99_ms'] - base['p99_ms']:>+8.2f} "
+                f"{row['queries_per_op'] - base['queries_per_op']:>+6.2f} "
+                f"{row['commits_per_op'] - base['commits_per_op']:>+6.2f} "
+                f"{row['rest_per_op'] - base['rest_per_op']:>+7.2f}"
+            )
+
+
+def main() -> None:
+    load_dotenv(override=True)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=1)
+    parser.add_argument("--polls", type=int, default=5, help="polls per guild")
+    parser.add_argument("--options", type=int, default=3, help="options per poll")
+    parser.add_argument("--bettors", type=int, default=100, help="bettors per guild")
+    parser.add_argument("--stake", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--lock-delay",
+        type=float,
+        default=1.0,
+        help="seconds from the end of betting to the polls' lock deadline",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--db-name", default=os.getenv("BENCH_DB_NAME", "marketbot_bench")
+    )
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results to diff against")
+    args = parser.parse_args()
+
+    results = asyncio.run(Lifecycle(args).run())
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
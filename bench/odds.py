@@ -0,0 +1,161 @@
+"""Time the vectorised payout split against the per-bet float loop.
+
+    python -m bench.odds --bets 10000,100000 --settle 10000
+
+For each --bets size the winning stakes are split both ways and the
+report shows the time per split and how many cents the float loop's
+rounded payouts drift from the pool. --settle also times
+BetManager.settle on a poll with that many winning bets; like
+bench.lifecycle that drops and recreates every table in BENCH_DB_NAME
+(or --db-name).
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Callable, List
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import insert, select
+
+from bench.lifecycle import percentile
+from util import Database
+from util.models import Account, Bet, Poll, PollOption, PollStatus
+from util.odds import split_pool, to_cents
+
+GUILD_ID = 1
+PRIZE = 100.0
+
+
+def float_loop(prize: float, total_stake: float, stakes: List[float]) -> List[float]:
+    # How payouts were computed before: one rounded float product per bet.
+    ratio = (prize + total_stake) / sum(stakes)
+    return [round(stake * ratio, 2) for stake in stakes]
+
+
+def vectorised(prize: float, total_stake: float, stakes: List[float]) -> np.ndarray:
+    pool = int(to_cents([prize + total_stake])[0])
+    return split_pool(pool, to_cents(stakes))
+
+
+def timed(run: Callable[[], object], repeat: int) -> List[float]:
+    latencies = []
+    for _ in range(repeat):
+        start = perf_counter()
+        run()
+        latencies.append(perf_counter() - start)
+    return latencies
+
+
+def bench_split(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    print(f"{'bets':>8} {'method':<11} {'p50ms':>8} {'p95ms':>8} {'drift¢':>7}")
+    for size in map(int, args.bets.split(",")):
+        stakes = np.round(rng.uniform(25.01, 500, size), 2)
+        total_stake = round(float(stakes.sum()) * 3, 2)
+        pool_cents = int(to_cents([PRIZE + total_stake])[0])
+        stake_list = stakes.tolist()
+
+        methods = (
+            ("float loop", float_loop, to_cents),
+            ("vectorised", vectorised, np.asarray),
+        )
+        for name, method, cents in methods:
+            payouts = method(PRIZE, total_stake, stake_list)
+            drift = int(cents(payouts).sum()) - pool_cents
+            latencies = timed(
+                lambda: method(PRIZE, total_stake, stake_list), args.repeat
+            )
+            print(
+                f"{size:>8} {name:<11} {percentile(latencies, 0.5) * 1000:>8.2f} "
+                f"{percentile(latencies, 0.95) * 1000:>8.2f} {drift:>7}"
+            )
+
+
+async def bench_settle(args: argparse.Namespace) -> None:
+    db = Database.from_env(db_name=args.db_name)
+    await db.drop_tables()
+    await db.create_tables()
+
+    now = datetime.now(timezone.utc)
+    async with db.async_session() as session:
+        await session.execute(
+            insert(Account),
+            [
+                {"guild_id": GUILD_ID, "account_number": n, "name": f"user{n}"}
+                for n in range(args.settle)
+            ],
+        )
+        account_ids = (await session.execute(select(Account.id))).scalars().all()
+        poll = Poll(
+            account_id=account_ids[0],
+            status=PollStatus.LOCKED,
+            question="benchmark poll",
+            created_on=now,
+            lockin_by=now + timedelta(minutes=1),
+            reference=f"https://discord.com/channels/{GUILD_ID}/1/1",
+            guild_id=GUILD_ID,
+            channel_id=1,
+            message_id=1,
+        )
+        session.add(poll)
+        await session.flush()
+        await session.execute(
+            insert(PollOption),
+            [
+                {"poll_id": poll.id, "index": index, "value": f"{index}"}
+                for index in (1, 2)
+            ],
+        )
+        option_ids = (await session.execute(select(PollOption.id))).scalars().all()
+        rng = np.random.default_rng(args.seed)
+        await session.execute(
+            insert(Bet),
+            [
+                {
+                    "account_id": account_id,
+                    "option_id": option_ids[n % 2],
+                    "stake": round(float(rng.uniform(25.01, 500)), 2),
+                }
+                for n, account_id in enumerate(account_ids)
+            ],
+        )
+        await session.commit()
+
+    async with db.async_session() as session:
+        poll = await db.polls.get(session, GUILD_ID, poll.id)
+        start = perf_counter()
+        paid, payout = await db.bets.settle(
+            session, poll=poll, winning_option=poll.options[0], prize=PRIZE
+        )
+        elapsed = perf_counter() - start
+
+    print(
+        f"settle: {paid} winners of {args.settle} bets paid ${payout:.2f} "
+        f"in {elapsed * 1000:.1f}ms"
+    )
+    await db.dispose()
+
+
+def main() -> None:
+    load_dotenv(override=True)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bets", default="10000,100000", help="winning bets per split")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--settle", type=int, default=0, help="bets in the poll")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--db-name", default=os.getenv("BENCH_DB_NAME", "marketbot_bench")
+    )
+    args = parser.parse_args()
+
+    bench_split(args)
+    if args.settle:
+        asyncio.run(bench_settle(args))
+
+
+if __name__ == "__main__":
+    main()
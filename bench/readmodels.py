@@ -0,0 +1,166 @@
+"""Compare ORM loads with the projection read models on the hot read paths.
+
+    python -m bench.readmodels --polls 2000 --options 4 --bettors 200
+
+Like bench.lifecycle this drops and recreates every table in BENCH_DB_NAME
+(or --db-name). Each path is timed over --repeat runs in a fresh session,
+and tracemalloc records the peak allocation of one run plus the memory
+still held by its result.
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List
+
+from dotenv import load_dotenv
+from sqlalchemy import insert, select
+
+from bench.lifecycle import percentile
+from util import Database
+from util.models import Account, Bet, Poll, PollOption, PollStatus
+
+GUILD_ID = 1
+
+
+async def seed(db: Database, args: argparse.Namespace) -> None:
+    rnd = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    async with db.async_session() as session:
+        await session.execute(
+            insert(Account),
+            [
+                {"guild_id": GUILD_ID, "account_number": n, "name": f"user{n}"}
+                for n in range(args.bettors)
+            ],
+        )
+        account_ids = (await session.execute(select(Account.id))).scalars().all()
+        await session.execute(
+            insert(Poll),
+            [
+                {
+                    "account_id": account_ids[0],
+                    "status": PollStatus.OPEN,
+                    "question": f"benchmark poll {n}",
+                    "created_on": now,
+                    "lockin_by": now + timedelta(hours=1),
+                    "reference": f"https://discord.com/channels/{GUILD_ID}/1/{n}",
+                    "guild_id": GUILD_ID,
+                    "channel_id": 1,
+                    "message_id": n,
+                }
+                for n in range(args.polls)
+            ],
+        )
+        poll_ids = (await session.execute(select(Poll.id))).scalars().all()
+        await session.execute(
+            insert(PollOption),
+            [
+                {"poll_id": poll_id, "index": index, "value": f"option {index}"}
+                for poll_id in poll_ids
+                for index in range(1, args.options + 1)
+            ],
+        )
+        option_ids = (await session.execute(select(PollOption.id))).scalars().all()
+        await session.execute(
+            insert(Bet),
+            [
+                {"account_id": account_id, "option_id": option_id, "stake": 30.0}
+                for account_id in account_ids
+                for option_id in rnd.sample(option_ids, args.positions)
+            ],
+        )
+        await session.commit()
+
+
+async def measure(
+    db: Database, load: Callable[..., Awaitable], repeat: int
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    for _ in range(repeat):
+        async with db.async_session() as session:
+            start = perf_counter()
+            await load(session)
+            latencies.append(perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    async with db.async_session() as session:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = await load(session)
+        session.expunge_all()
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "peak_kib": (peak - baseline) / 1024,
+        "retained_kib": (retained - baseline) / 1024,
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    db = Database.from_env(db_name=args.db_name)
+    await db.drop_tables()
+    await db.create_tables()
+    await seed(db, args)
+
+    async with db.async_session() as session:
+        account = await db.accounts.get(session, guild_id=GUILD_ID, account_number=0)
+        poll_id = (await session.execute(select(Poll.id).limit(1))).scalar_one()
+
+    paths = {
+        "open polls": (
+            lambda session: db.polls.get_all(session, status=PollStatus.OPEN),
+            lambda session: db.polls.get_open_deadlines(session),
+        ),
+        "poll lookup": (
+            lambda session: db.polls.get(session, GUILD_ID, poll_id),
+            lambda session: db.polls.get_view(session, GUILD_ID, poll_id),
+        ),
+        "positions": (
+            lambda session: db.bets.get_all_active_by_account(session, account),
+            lambda session: db.bets.get_positions(session, account.id),
+        ),
+    }
+
+    print(
+        f"{'path':<12} {'load':<6} {'p50ms':>8} {'p95ms':>8} "
+        f"{'peakKiB':>9} {'heldKiB':>9}"
+    )
+    for name, loads in paths.items():
+        for label, load in zip(("orm", "view"), loads):
+            row = await measure(db, load, args.repeat)
+            print(
+                f"{name:<12} {label:<6} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                f"{row['peak_kib']:>9.1f} {row['retained_kib']:>9.1f}"
+            )
+
+    await db.dispose()
+
+
+def main() -> None:
+    load_dotenv(override=True)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=2000, help="open polls")
+    parser.add_argument("--options", type=int, default=4, help="options per poll")
+    parser.add_argument("--bettors", type=int, default=200)
+    parser.add_argument("--positions", type=int, default=20, help="bets per bettor")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--db-name", default=os.getenv("BENCH_DB_NAME", "marketbot_bench")
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
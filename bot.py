@@ -1,63 +1,300 @@
 import asyncio
 import discord
 import os
-from datetime import datetime, timezone
+import traceback
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Collection, List, Optional
 from dotenv import load_dotenv
+from discord import app_commands
 from discord.ext import commands
 from util import Database
-from util.models import PollStatus
+from util.models import Poll, PollStatus
 from util.embeds import poll_embed_maker
+from util.batcher import BetBatcher
+from util.commandsync import CommandSync
+from util.debounce import Debouncer
+from util.metrics import Metrics, MetricsServer
+from util.outbox import Outbox, Priority
+from util.scheduler import DeadlineScheduler
+from util.sharding import Shard
+
+BASE_PRIZE = 100.0
+# Due polls are claimed this many at a time.
+LOCK_BATCH = 100
+# Seconds before retrying a due poll the claim skipped because a bet held it.
+LOCK_RETRY_DELAY = 0.5
+
+
+class MarketTree(app_commands.CommandTree):
+    """Command tree that times every application command for the metrics."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started_at"] = perf_counter()
+        return True
+
+    async def on_error(
+        self, interaction: discord.Interaction, error: app_commands.AppCommandError
+    ):
+        name = command_name(interaction)
+        self.client.metrics.command_error(name, type(error).__name__)
+        observe_command(self.client.metrics, interaction)
+        await super().on_error(interaction, error)
+
+
+def command_name(interaction: discord.Interaction) -> str:
+    command = interaction.command
+    return command.qualified_name if command is not None else "<unknown>"
+
+
+def observe_command(metrics: Metrics, interaction: discord.Interaction) -> None:
+    started_at = interaction.extras.get("started_at")
+    if started_at is not None:
+        metrics.observe_command(command_name(interaction), perf_counter() - started_at)
 
 
 class MarketBot(commands.Bot):
     def __init__(self, command_prefix: str, **kwargs):
-        super().__init__(command_prefix=command_prefix, **kwargs)
         load_dotenv(override=True)
+        kwargs.setdefault("tree_cls", MarketTree)
+        # Run one shard per process with SHARD_COUNT and SHARD_ID; the gateway
+        # then only delivers that shard's guilds and background work follows.
+        if os.getenv("SHARD_COUNT"):
+            kwargs.setdefault("shard_count", int(os.getenv("SHARD_COUNT")))
+            kwargs.setdefault("shard_id", int(os.getenv("SHARD_ID", 0)))
+        super().__init__(command_prefix=command_prefix, **kwargs)
 
-        self.db = Database(
-            user=os.getenv("DB_USER"),
-            passwd=os.getenv("DB_PASSWD"),
-            db_name=os.getenv("DB_NAME"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT"),
-        )
+        self.shard = Shard(self.shard_id, self.shard_count)
+        self.db = Database.from_env()
 
+        self.poll_deadlines = DeadlineScheduler()
+        self.poll_embeds = Debouncer(
+            self.refresh_poll_embed,
+            window=float(os.getenv("EMBED_UPDATE_WINDOW", 2)),
+        )
+        # Group commit for /poll bet, off unless BET_BATCH_WINDOW is set.
+        self.bet_batcher = None
+        if os.getenv("BET_BATCH_WINDOW"):
+            self.bet_batcher = BetBatcher(
+                self.db,
+                window=float(os.getenv("BET_BATCH_WINDOW")),
+                max_batch=int(os.getenv("BET_BATCH_SIZE", 100)),
+            )
+        self.outbox = Outbox(concurrency=int(os.getenv("OUTBOX_CONCURRENCY", 8)))
+        self.outbox_drain_timeout = float(os.getenv("OUTBOX_DRAIN_TIMEOUT", 5))
+        # Seconds between sweeps for due polls this process never scheduled,
+        # such as ones a dead process created; 0 turns the sweep off.
+        self.lock_sweep_interval = float(os.getenv("LOCK_SWEEP_INTERVAL", 5)) or None
+        self.ledger_fold_interval = float(os.getenv("LEDGER_FOLD_INTERVAL", 60))
+        self.command_sync = CommandSync(
+            self.tree,
+            os.getenv("COMMAND_HASH_FILE", ".command_hashes.json"),
+            [int(os.getenv("DEBUG_GUILD"))] if os.getenv("DEBUG_GUILD") else None,
+        )
+        self.metrics = Metrics()
+        self.metrics.gauge(
+            "gateway_latency_seconds",
+            "Discord gateway heartbeat latency.",
+            lambda: {(): self.latency},
+        )
+        self.metrics.gauge(
+            "db_pool_connections",
+            "Database connections by state.",
+            lambda: {
+                (("state", "checked_out"),): self.db.stats.pool_checked_out,
+                (("state", "peak"),): self.db.stats.pool_peak,
+                (("state", "capacity"),): self.db.stats.pool_capacity,
+            },
+        )
+        self.metrics.histogram(
+            "db_pool_wait_seconds",
+            "Time spent waiting for a database connection.",
+            lambda: self.db.stats.pool_wait,
+        )
+        self.metrics_server = None
+        if os.getenv("METRICS_PORT"):
+            # Only local scrapers by default; set METRICS_HOST=0.0.0.0 to
+            # expose the endpoint on every interface.
+            self.metrics_server = MetricsServer(
+                self.metrics,
+                host=os.getenv("METRICS_HOST", "127.0.0.1"),
+                port=int(os.getenv("METRICS_PORT")),
+            )
         self.is_synced = False
 
     async def setup_hook(self):
+        async with self.db.async_session() as session:
+            await self.db.load_stakes(session, self.shard)
+            await self.db.load_poll_index(session, self.shard)
+
+        # Cogs are loaded before start(), so the tree is complete here.
+        try:
+            synced = await self.command_sync.sync()
+            print(f"Synced commands for {synced or 'no changed scopes'}")
+            self.is_synced = True
+        except discord.HTTPException:
+            traceback.print_exc()
+
         self.bg_task = self.loop.create_task(self.poll_status_checker())
+        self.fold_task = self.loop.create_task(self.ledger_folder())
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+            self.lag_task = self.loop.create_task(self.metrics.monitor_loop_lag())
 
     async def poll_status_checker(self):
+        async with self.db.async_session() as session:
+            polls = await self.db.polls.get_open_deadlines(session, self.shard)
+            for poll in polls:
+                self.poll_deadlines.schedule(poll.id, poll.lockin_by)
+
         await self.wait_until_ready()
         while not self.is_closed():
-            async with self.db.async_session() as session:
-                polls = await self.db.polls.get_all(session, status=PollStatus.OPEN)
-                for poll in polls:
-                    if poll.lockin_by <= datetime.now(timezone.utc):
-                        await self.db.polls.update(
-                            session, poll, status=PollStatus.LOCKED
-                        )
-                        _, channel_id, message_id = list(
-                            map(int, poll.reference[29:].split("/"))
-                        )
-                        channel = self.get_channel(channel_id)
-                        await channel.send(
-                            embed=discord.Embed(
-                                title=f"Betting for `{poll.question:.45}` has locked",
-                                description=f"<@{poll.account.account_number}>",
-                                url=poll.reference,
-                            )
-                        )
-                        msg = await channel.fetch_message(message_id)
-                        original = msg.embeds[0]
-                        stakes = await self.db.bets.get_stake_totals(session, poll=poll)
-                        embed = poll_embed_maker.update_open_poll(
-                            100, original, poll, stakes
-                        )
-                        embed = poll_embed_maker.lock_open_poll(original, poll)
-                        await msg.edit(embed=embed)
-
-            await asyncio.sleep(60)
+            # The local deadlines give exact timing; the periodic sweep picks
+            # up polls another process scheduled but never got to lock.
+            # Either way every due poll of this shard is claimed.
+            due = await self.poll_deadlines.wait_due(timeout=self.lock_sweep_interval)
+            start = perf_counter()
+            try:
+                claimed = await self.lock_polls(scheduled=due)
+                missed = set(due).difference(claimed)
+                if missed:
+                    await self.retry_locks(missed)
+            except Exception:
+                traceback.print_exc()
+            self.metrics.observe_loop("poll_status_checker", perf_counter() - start)
+
+    async def ledger_folder(self):
+        """Fold committed ledger entries into the account balance snapshots,
+        which keeps the unfolded tail each balance read sums up short."""
+        while not self.is_closed():
+            await asyncio.sleep(self.ledger_fold_interval)
+            start = perf_counter()
+            try:
+                async with self.db.async_session() as session:
+                    while await self.db.ledger.fold(session) > 0:
+                        pass
+            except Exception:
+                traceback.print_exc()
+            self.metrics.observe_loop("ledger_folder", perf_counter() - start)
+
+    async def lock_polls(
+        self,
+        poll_ids: Optional[List[int]] = None,
+        *,
+        scheduled: Collection[int] = (),
+    ) -> List[int]:
+        """Lock the given polls, or every due poll of this shard, and return
+        the ids this process claimed.
+
+        Polls are claimed in the database first, so with several processes
+        running each poll is announced by exactly one of them. ``scheduled``
+        names the due polls whose deadlines were already taken off
+        ``poll_deadlines``.
+        """
+        claimed = []
+        async with self.db.async_session() as session:
+            while True:
+                if poll_ids is None:
+                    batch = await self.db.polls.claim(
+                        session,
+                        due_by=datetime.now(timezone.utc),
+                        shard=self.shard,
+                        limit=LOCK_BATCH,
+                    )
+                else:
+                    batch = await self.db.polls.claim(
+                        session, ids=poll_ids, shard=self.shard
+                    )
+
+                for poll_id in batch:
+                    known = poll_id in scheduled or poll_id in self.poll_deadlines
+                    self.poll_deadlines.cancel(poll_id)
+                    try:
+                        await self.lock_poll(session, poll_id, known=known)
+                    except Exception:
+                        traceback.print_exc()
+                claimed.extend(batch)
+
+                if poll_ids is not None or len(batch) < LOCK_BATCH:
+                    return claimed
+
+    async def retry_locks(self, poll_ids: Collection[int]):
+        """Schedule another try for due polls the claim skipped, typically
+        because a bet still held them, if they are still open."""
+        async with self.db.async_session() as session:
+            polls = await self.db.polls.get_open_deadlines(
+                session, self.shard, poll_ids=list(poll_ids)
+            )
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=LOCK_RETRY_DELAY)
+        for poll in polls:
+            self.poll_deadlines.schedule(poll.id, max(poll.lockin_by, retry_at))
+
+    async def lock_poll(self, session, poll_id: int, known: bool = True):
+        poll = await self.db.polls.get_by_id(session, poll_id)
+        if poll is None or poll.status is not PollStatus.LOCKED:
+            return
+
+        self.poll_embeds.discard(poll.id)
+        self.db.poll_index.set_status(poll.id, PollStatus.LOCKED)
+        self.outbox.submit(
+            poll.channel_id,
+            lambda: self.poll_channel(poll).send(
+                embed=discord.Embed(
+                    title=f"Betting for `{poll.question:.45}` has locked",
+                    description=f"<@{poll.account.account_number}>",
+                    url=poll.reference,
+                )
+            ),
+        )
+        if not known:
+            # A poll this process never scheduled may have taken its bets
+            # elsewhere; reload its totals from the database.
+            self.db.stakes.discard(poll.id)
+        stakes = await self.db.get_stake_totals(session, poll)
+        embed = poll_embed_maker.render(BASE_PRIZE, poll, poll.options, stakes)
+        self.edit_poll_message(poll, embed)
+
+    async def refresh_poll_embed(self, poll_id: int):
+        async with self.db.async_session() as session:
+            poll = await self.db.polls.get_by_id(session, poll_id)
+            if poll is None or poll.status is not PollStatus.OPEN:
+                return
+            stakes = await self.db.get_stake_totals(session, poll)
+
+        embed = poll_embed_maker.render(BASE_PRIZE, poll, poll.options, stakes)
+        await self.edit_poll_message(poll, embed)
+
+    def poll_channel(self, poll: Poll) -> discord.PartialMessageable:
+        return self.get_partial_messageable(poll.channel_id, guild_id=poll.guild_id)
+
+    def poll_message(self, poll: Poll) -> discord.PartialMessage:
+        return self.poll_channel(poll).get_partial_message(poll.message_id)
+
+    def edit_poll_message(
+        self,
+        poll: Poll,
+        embed: discord.Embed,
+        priority: Priority = Priority.BACKGROUND,
+    ) -> asyncio.Future:
+        """Queue an edit of the poll message; a newer queued edit replaces it."""
+        return self.outbox.submit(
+            poll.channel_id,
+            lambda: self.poll_message(poll).edit(embed=embed),
+            key=("edit", poll.message_id),
+            priority=priority,
+        )
+
+    async def on_app_command_completion(
+        self, interaction: discord.Interaction, command: app_commands.Command
+    ):
+        observe_command(self.metrics, interaction)
+
+    async def close(self):
+        # Let queued message edits go out while the HTTP session is still open.
+        await self.outbox.close(timeout=self.outbox_drain_timeout)
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+        await super().close()
 
     async def on_ready(self):
         print(f"{self.user.name}")
@@ -26,31 +26,71 @@ class AccountCog(commands.Cog):
                 name=interaction.user.name,
             )
 
-            embed = Embed(
-                title=f"{interaction.user.display_name}'s Balance",
-                description=f"${account.balance:.2f}",
-            )
+        embed = Embed(
+            title=f"{interaction.user.display_name}'s Balance",
+            description=f"${account.balance:.2f}",
+        )
+
+        async with self.client.db.read_session(
+            (interaction.guild_id, interaction.user.id)
+        ) as session:
+            positions = await self.client.db.bets.get_positions(session, account.id)
+
+        if len(positions) > 0:
+            parsed_bets = {
+                "Pending Poll": tuple(
+                    f"[`{position.question:.20}`]({position.reference})"
+                    for position in positions
+                ),
+                "Option": tuple(
+                    f":number_{position.option_index}: `{position.option_value:.10}`"
+                    for position in positions
+                ),
+                "Stake": tuple(f"`${position.stake:.2f}`" for position in positions),
+            }
 
-            raw_bets = await self.client.db.bets.get_all_active_by_account(
-                session, account
+            for name, values in parsed_bets.items():
+                embed.add_field(name=name, value="\n".join(values))
+
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.guild_only()
+    @app_commands.command(name="leaderboard")
+    async def leaderboard(self, interaction: discord.Interaction, page: int = 1):
+        """View the richest accounts in this server.
+
+        Parameters
+        -----------
+        page: int
+            Page of the leaderboard, 10 accounts per page.
+        """
+
+        rows = []
+        if page > 0:
+            async with self.client.db.async_session() as session:
+                rows = await self.client.db.get_leaderboard(
+                    session, interaction.guild_id, page
+                )
+
+        if not rows:
+            await interaction.response.send_message(
+                f"There is no page {page}.", ephemeral=True
             )
-            if len(raw_bets) > 0:
-                parsed_bets = {
-                    "Pending Poll": tuple(
-                        f"[`{bet.option.poll.question:.20}`]({bet.option.poll.reference})"
-                        for bet in raw_bets
-                    ),
-                    "Option": tuple(
-                        f":number_{bet.option.index}: `{bet.option.value:.10}`"
-                        for bet in raw_bets
-                    ),
-                    "Stake": tuple(f"`${bet.stake:.2f}`" for bet in raw_bets),
-                }
-
-                for name, values in parsed_bets.items():
-                    embed.add_field(name=name, value="\n".join(values))
-
-            await interaction.response.send_message(embed=embed)
+            return
+
+        first = (page - 1) * 10 + 1
+        embed = Embed(title="Leaderboard")
+        embed.add_field(
+            name="Rank",
+            value="\n".join(f"`#{rank}`" for rank in range(first, first + len(rows))),
+        )
+        embed.add_field(name="Account", value="\n".join(f"`{row[2]}`" for row in rows))
+        embed.add_field(
+            name="Balance", value="\n".join(f"`${row[3]:.2f}`" for row in rows)
+        )
+        embed.set_footer(text=f"Page {page}")
+
+        await interaction.response.send_message(embed=embed)
 
 
 async def setup(client: MarketBot):
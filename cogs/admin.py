@@ -21,19 +21,41 @@ class AdminCog(commands.Cog):
         if interaction.user.id == 246534330657144832:
             await self.client.db.drop_tables()
             await self.client.db.create_tables()
+            self.client.db.clear_caches()
             await interaction.response.send_message("Tables reset", ephemeral=True)
         else:
             await interaction.response.send_message(
                 "You must be the owner to use this command!", ephemeral=True
             )
 
+    @app_commands.guild_only()
+    @app_commands.command(name="dbstats")
+    async def dbstats(self, interaction: discord.Interaction):
+        """Dump database timings"""
+        if interaction.user.id == 246534330657144832:
+            db = self.client.db
+            cache = db.accounts.cache.stats()
+            report = (
+                db.stats.dump()
+                + f"\naccount cache: {cache['size']} entries, "
+                + f"{cache['hits']} hits, {cache['misses']} misses"
+                + f"\n{self.client.outbox.stats.dump()}"
+            )
+            await interaction.response.send_message(
+                f"```\n{report[-1900:]}\n```", ephemeral=True
+            )
+        else:
+            await interaction.response.send_message(
+                "You must be the owner to use this command!", ephemeral=True
+            )
+
     @app_commands.guild_only()
     @app_commands.command(name="sync")
     async def sync(self, interaction: discord.Interaction):
-        """Sync Global Commands"""
+        """Sync Commands"""
         if interaction.user.id == 246534330657144832:
             print(self.client.tree.get_commands())
-            await self.client.tree.sync()
+            await self.client.command_sync.sync(force=True)
             await interaction.response.send_message(
                 "Synced Successfully", ephemeral=True
             )
@@ -1,15 +1,67 @@
 import os
 import discord
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import List, Literal, Optional, Set, Tuple
 from discord import app_commands
 from discord.ext import commands
 from sqlalchemy.exc import DBAPIError
-from bot import MarketBot
+from bot import BASE_PRIZE, MarketBot
 from util.embeds import poll_embed_maker
+from util.managers import PollClosedError
 from util.models import PollStatus
+from util.outbox import Priority
 from util.transformers import Duration, Options
 
-BASE_PRIZE = 100.0
+
+POLL_PAGE_SIZE = 10
+
+STATUS_CHOICES = {
+    "open": PollStatus.OPEN,
+    "locked": PollStatus.LOCKED,
+    "closed": PollStatus.FINALIZED,
+}
+
+
+class PollListView(discord.ui.View):
+    def __init__(
+        self,
+        cog: "PollCog",
+        user_id: int,
+        status: Optional[PollStatus],
+        account_number: Optional[int],
+        rows: list,
+    ):
+        super().__init__(timeout=180)
+        self.cog = cog
+        self.user_id = user_id
+        self.status = status
+        self.account_number = account_number
+        self.page = 1
+        self.rows = rows[:POLL_PAGE_SIZE]
+        self.next_page.disabled = len(rows) <= POLL_PAGE_SIZE
+
+    @property
+    def embed(self) -> discord.Embed:
+        return poll_embed_maker.poll_list(self.rows, self.page)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        last = self.rows[-1]
+        rows = await self.cog.poll_page(
+            interaction.guild_id,
+            self.status,
+            self.account_number,
+            (last.created_on, last.id),
+        )
+        self.page += 1
+        self.rows = rows[:POLL_PAGE_SIZE]
+        button.disabled = len(rows) <= POLL_PAGE_SIZE
+        await interaction.response.edit_message(embed=self.embed, view=self)
 
 
 @app_commands.guild_only()
@@ -46,7 +98,7 @@ class PollCog(commands.GroupCog, group_name="poll", group_description="Poll comm
         message = await interaction.original_response()
 
         async with self.client.db.async_session() as session:
-            start_time = datetime.now()
+            start_time = datetime.now(timezone.utc)
 
             account = await self.client.db.accounts.get_or_create(
                 session,
@@ -60,6 +112,9 @@ class PollCog(commands.GroupCog, group_name="poll", group_description="Poll comm
                 account=account,
                 question=question,
                 reference=message.jump_url,
+                guild_id=interaction.guild_id,
+                channel_id=interaction.channel_id,
+                message_id=message.id,
                 created_on=start_time,
                 lockin_by=start_time + lockin_duration.value,
             )
@@ -68,7 +123,18 @@ class PollCog(commands.GroupCog, group_name="poll", group_description="Poll comm
                 session, poll=poll, options=options.values
             )
 
-        embed = poll_embed_maker.new_poll(BASE_PRIZE, poll, poll_options)
+        self.client.db.stakes.track(poll.id, [option.index for option in poll_options])
+        self.client.db.poll_index.add(
+            interaction.guild_id,
+            poll.id,
+            poll.question,
+            options=[(option.index, option.value) for option in poll_options],
+        )
+        self.client.poll_deadlines.schedule(poll.id, poll.lockin_by)
+
+        embed = poll_embed_maker.render(
+            BASE_PRIZE, poll, poll_options, [0 for _ in poll_options]
+        )
         await interaction.followup.send(embed=embed)
 
     @app_commands.checks.cooldown(1, 5, key=lambda x: (x.guild_id, x.user.id))
@@ -93,7 +159,7 @@ class PollCog(commands.GroupCog, group_name="poll", group_description="Poll comm
         """
 
         async with self.client.db.async_session() as session:
-            poll = await self.client.db.polls.get(
+            poll = await self.client.db.polls.get_view(
                 session, interaction.guild_id, poll_id
             )
 
@@ -117,42 +183,36 @@ class PollCog(commands.GroupCog, group_name="poll", group_description="Poll comm
                 name=interaction.user.name,
             )
 
-            if account.balance < stake:
-                raise Exception("You got no money to bet on you broke ass bitch!")
+            option = poll.options[option_number - 1]
 
-            await self.client.db.accounts.update(
-                session, account, balance=account.balance - stake
-            )
-
-            option = sorted(poll.options, key=lambda x: x.index)[option_number - 1]
+            batcher = self.client.bet_batcher
+            try:
+                if batcher is None:
+                    balance = await self.client.db.bets.place(
+                        session, account=account, option=option, stake=stake
+                    )
+            except PollClosedError:
+                raise Exception("There is no open poll to bet on stupid")
 
-            bet = await self.client.db.bets.get(session, account, option)
+        if batcher is not None:
+            # Wait for the group commit without holding on to a connection.
+            try:
+                balance = await batcher.place(account, option, stake)
+            except PollClosedError:
+                raise Exception("There is no open poll to bet on stupid")
 
-            if bet:
-                await self.client.db.bets.update(session, bet, stake=bet.stake + stake)
-            else:
-                await self.client.db.bets.create(
-                    session,
-                    account=account,
-                    option=option,
-                    stake=stake,
-                )
+        if balance is None:
+            raise Exception("You got no money to bet on you broke ass bitch!")
 
-            stakes = await self.client.db.bets.get_stake_totals(session, poll=poll)
+        self.client.db.stakes.add(poll.id, option.index, stake)
+        self.client.db.wrote((interaction.guild_id, interaction.user.id))
 
         await interaction.response.send_message(
             f"${stake:.2f} placed on :number_{option.index}:`{option.value}` for [`{poll.question:.45}`]({poll.reference})",
             ephemeral=True,
         )
 
-        _, channel_id, message_id = list(map(int, poll.reference[29:].split("/")))
-        channel = self.client.get_channel(channel_id)
-        msg = await channel.fetch_message(message_id)
-        embed = poll_embed_maker.update_open_poll(
-            BASE_PRIZE, msg.embeds[0], poll, stakes
-        )
-
-        await msg.edit(embed=embed)
+        self.client.poll_embeds.mark_dirty(poll.id)
 
     @app_commands.command(name="close")
     @app_commands.checks.cooldown(1, 5, key=lambda x: (x.guild_id, x.user.id))
@@ -193,52 +253,133 @@ class PollCog(commands.GroupCog, group_name="poll", group_description="Poll comm
             if poll.account != account:
                 raise Exception("You do not own this poll.")
 
-            _, channel_id, message_id = list(map(int, poll.reference[29:].split("/")))
-            channel = self.client.get_channel(channel_id)
-            msg = await channel.fetch_message(message_id)
-            embed = msg.embeds[0]
-
             if poll.status is PollStatus.OPEN:
+                self.client.poll_deadlines.cancel(poll.id)
+                self.client.poll_embeds.discard(poll.id)
                 await self.client.db.polls.update(
-                    session, poll, status=PollStatus.LOCKED, lockin_by=datetime.now()
+                    session,
+                    poll,
+                    status=PollStatus.LOCKED,
+                    lockin_by=datetime.now(timezone.utc),
                 )
 
-                embed = poll_embed_maker.lock_open_poll(embed, poll)
-
-            await self.client.db.options.update(
-                session, poll.options[winning_number - 1], winning=True
+            winning_option = sorted(poll.options, key=lambda x: x.index)[
+                winning_number - 1
+            ]
+            stakes = await self.client.db.get_stake_totals(session, poll)
+            settled = await self.client.db.bets.settle(
+                session, poll=poll, winning_option=winning_option, prize=BASE_PRIZE
             )
+            if settled is None:
+                raise Exception(f"`{poll.question}` is already closed.")
+            paid, payout = settled
+            settled_stakes = self.client.db.stakes.settle(poll.id, winning_option.index)
+            self.client.db.poll_index.set_status(poll.id, PollStatus.FINALIZED)
 
-            await self.client.db.polls.update(
-                session, poll, status=PollStatus.FINALIZED, finalized_on=datetime.now()
-            )
+        closed_embed = poll_embed_maker.closed_poll(
+            poll, winning_option, paid, payout, settled_stakes
+        )
+        await interaction.response.send_message(embed=closed_embed)
 
-            winner_stakes = await self.client.db.bets.get_stake_totals(
-                session, poll=poll, winners=True
-            )
+        embed = poll_embed_maker.render(
+            BASE_PRIZE, poll, poll.options, stakes, winning_option.index
+        )
+        self.client.edit_poll_message(poll, embed, Priority.INTERACTIVE)
 
-            if sum(winner_stakes) > 0:
-                all_stakes = await self.client.db.bets.get_stake_totals(
-                    session, poll=poll
-                )
+    def poll_choices(
+        self, interaction: discord.Interaction, current: str, statuses: Set[PollStatus]
+    ) -> List[app_commands.Choice[int]]:
+        polls = self.client.db.poll_index.search(
+            interaction.guild_id, current, statuses
+        )
+        return [
+            app_commands.Choice(name=f"{poll.id}: {poll.question}"[:100], value=poll.id)
+            for poll in polls
+        ]
+
+    def option_choices(
+        self, interaction: discord.Interaction, current: str
+    ) -> List[app_commands.Choice[int]]:
+        poll_id = interaction.namespace.poll_id
+        poll = self.client.db.poll_index.get(interaction.guild_id, poll_id)
+        if poll is None:
+            return []
+        needle = current.strip().casefold()
+        return [
+            app_commands.Choice(name=f"{index}: {value}"[:100], value=index)
+            for index, value in poll.options
+            if not needle or needle in f"{index} {value}".casefold()
+        ][:25]
+
+    @bet.autocomplete("poll_id")
+    async def bet_poll_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> List[app_commands.Choice[int]]:
+        return self.poll_choices(interaction, current, {PollStatus.OPEN})
+
+    @bet.autocomplete("option_number")
+    async def bet_option_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> List[app_commands.Choice[int]]:
+        return self.option_choices(interaction, current)
+
+    @close.autocomplete("poll_id")
+    async def close_poll_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> List[app_commands.Choice[int]]:
+        return self.poll_choices(
+            interaction, current, {PollStatus.OPEN, PollStatus.LOCKED}
+        )
+
+    @close.autocomplete("winning_number")
+    async def close_option_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> List[app_commands.Choice[int]]:
+        return self.option_choices(interaction, current)
 
-                payout_ratio = (BASE_PRIZE + sum(all_stakes)) / sum(winner_stakes)
+    @app_commands.command(name="list")
+    async def list_polls(
+        self,
+        interaction: discord.Interaction,
+        status: Optional[Literal["open", "locked", "closed"]] = None,
+        creator: Optional[discord.User] = None,
+    ):
+        """List this server's polls, newest first.
 
-                betters = await self.client.db.bets.get_winning_bets(session, poll=poll)
+        Parameters
+        -----------
+        status: str
+            Only show polls with this status.
+        creator: discord.User
+            Only show polls created by this user.
+        """
 
-                for better in betters:
-                    await self.client.db.accounts.update(
-                        session,
-                        better.account,
-                        balance=better.account.balance + (better.stake * payout_ratio),
-                    )
+        poll_status = STATUS_CHOICES.get(status)
+        account_number = creator.id if creator else None
+        rows = await self.poll_page(interaction.guild_id, poll_status, account_number)
 
-        closed_embed = poll_embed_maker.closed_poll(
-            poll, sorted(poll.options, key=lambda x: x.index)[winning_number - 1]
+        view = PollListView(
+            self, interaction.user.id, poll_status, account_number, rows
         )
-        await interaction.response.send_message(embed=closed_embed)
-        embed = poll_embed_maker.close_locked_poll(embed)
-        await msg.edit(embed=embed)
+        await interaction.response.send_message(embed=view.embed, view=view)
+
+    async def poll_page(
+        self,
+        guild_id: int,
+        status: Optional[PollStatus],
+        account_number: Optional[int],
+        before: Optional[Tuple[datetime, int]] = None,
+    ) -> list:
+        # One extra row tells the view whether there is a next page.
+        async with self.client.db.read_session() as session:
+            return await self.client.db.polls.get_page(
+                session,
+                guild_id=guild_id,
+                limit=POLL_PAGE_SIZE + 1,
+                status=status,
+                account_number=account_number,
+                before=before,
+            )
 
     async def cog_app_command_error(
         self, interaction: discord.Interaction, error: app_commands.AppCommandError
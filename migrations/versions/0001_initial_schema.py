@@ -0,0 +1,109 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "account",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("guild_id", sa.BIGINT(), nullable=False),
+        sa.Column("account_number", sa.BIGINT(), nullable=False),
+        sa.Column("name", sa.String(length=32), nullable=False),
+        sa.Column(
+            "created_on",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "balance",
+            sa.NUMERIC(precision=19, scale=2),
+            server_default=sa.text("1000"),
+            nullable=False,
+        ),
+        sa.CheckConstraint("balance >= 0"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("guild_id", "account_number", "name", name="account_ukey"),
+    )
+    op.create_table(
+        "poll",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("OPEN", "LOCKED", "FINALIZED", name="pollstatus"),
+            nullable=False,
+        ),
+        sa.Column("question", sa.String(length=250), nullable=False),
+        sa.Column("created_on", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("lockin_by", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "finalized_on",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("'infinity'::timestamp"),
+            nullable=False,
+        ),
+        sa.Column("reference", sa.String(length=100), nullable=False),
+        sa.CheckConstraint("finalized_on > created_on"),
+        sa.CheckConstraint("lockin_by > created_on"),
+        sa.ForeignKeyConstraint(["account_id"], ["account.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("reference"),
+    )
+    op.create_table(
+        "poll_option",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("poll_id", sa.Integer(), nullable=False),
+        sa.Column("index", sa.Integer(), nullable=False),
+        sa.Column("value", sa.String(length=250), nullable=False),
+        sa.Column(
+            "winning", sa.Boolean(), server_default=sa.text("False"), nullable=False
+        ),
+        sa.CheckConstraint("index > 0"),
+        sa.ForeignKeyConstraint(["poll_id"], ["poll.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("poll_id", "index", name="poll_option_ukey"),
+    )
+    op.create_table(
+        "bet",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("option_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_on",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("stake", sa.NUMERIC(precision=19, scale=2), nullable=False),
+        sa.CheckConstraint("stake > 0"),
+        sa.ForeignKeyConstraint(["account_id"], ["account.id"]),
+        sa.ForeignKeyConstraint(["option_id"], ["poll_option.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("account_id", "option_id", name="bet_ukey"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bet")
+    op.drop_table("poll_option")
+    op.drop_table("poll")
+    op.drop_table("account")
+    sa.Enum(name="pollstatus").drop(op.get_bind())
@@ -0,0 +1,36 @@
+"""access path indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_poll_status", "poll", ["status"])
+    op.create_index(
+        "ix_poll_open_lockin_by",
+        "poll",
+        ["lockin_by"],
+        postgresql_where=sa.text("status = 'OPEN'"),
+    )
+    op.create_index("ix_bet_option_id", "bet", ["option_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bet_option_id", table_name="bet")
+    op.drop_index("ix_poll_open_lockin_by", table_name="poll")
+    op.drop_index("ix_poll_status", table_name="poll")
@@ -0,0 +1,48 @@
+"""poll message ids
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("guild_id", "channel_id", "message_id")
+
+
+def upgrade() -> None:
+    for column in COLUMNS:
+        op.add_column("poll", sa.Column(column, sa.BIGINT(), nullable=True))
+
+    # reference is the jump url: https://discord.com/channels/<guild>/<channel>/<message>
+    op.execute(
+        "UPDATE poll SET "
+        "guild_id = split_part(reference, '/', 5)::bigint, "
+        "channel_id = split_part(reference, '/', 6)::bigint, "
+        "message_id = split_part(reference, '/', 7)::bigint"
+    )
+
+    for column in COLUMNS:
+        op.alter_column("poll", column, nullable=False)
+    op.create_index("ix_poll_guild_id", "poll", ["guild_id"])
+    op.create_index("ix_poll_channel_id", "poll", ["channel_id"])
+    op.create_unique_constraint("poll_message_id_key", "poll", ["message_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("poll_message_id_key", "poll", type_="unique")
+    op.drop_index("ix_poll_channel_id", table_name="poll")
+    op.drop_index("ix_poll_guild_id", table_name="poll")
+    for column in reversed(COLUMNS):
+        op.drop_column("poll", column)
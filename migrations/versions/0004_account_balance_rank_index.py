@@ -0,0 +1,31 @@
+"""account balance rank index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_account_guild_id_balance",
+        "account",
+        ["guild_id", sa.text("balance DESC"), "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_account_guild_id_balance", table_name="account")
@@ -0,0 +1,34 @@
+"""poll guild created_on index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_poll_guild_id_created_on",
+        "poll",
+        ["guild_id", sa.text("created_on DESC"), sa.text("id DESC")],
+    )
+    # Covered by the leading column of ix_poll_guild_id_created_on.
+    op.drop_index("ix_poll_guild_id", table_name="poll")
+
+
+def downgrade() -> None:
+    op.create_index("ix_poll_guild_id", "poll", ["guild_id"])
+    op.drop_index("ix_poll_guild_id_created_on", table_name="poll")
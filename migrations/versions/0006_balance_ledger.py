@@ -0,0 +1,74 @@
+"""balance ledger
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_entry",
+        sa.Column("id", sa.BIGINT(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.NUMERIC(precision=19, scale=2), nullable=False),
+        sa.Column(
+            "reason",
+            sa.Enum("BET", "PAYOUT", "GRANT", name="ledgerreason"),
+            nullable=False,
+        ),
+        sa.Column("poll_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_on",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "folded", sa.Boolean(), server_default=sa.text("False"), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["account_id"], ["account.id"]),
+        sa.ForeignKeyConstraint(["poll_id"], ["poll.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_ledger_entry_account_id", "ledger_entry", ["account_id", "id"])
+    op.create_index(
+        "ix_ledger_entry_unfolded",
+        "ledger_entry",
+        ["account_id"],
+        postgresql_where=sa.text("NOT folded"),
+    )
+    # Existing balances become the opening entry of each history, already
+    # folded into the snapshot they came from.
+    op.execute(
+        "INSERT INTO ledger_entry (account_id, amount, reason, folded) "
+        "SELECT id, balance, 'GRANT', true FROM account WHERE balance <> 0"
+    )
+    op.alter_column("account", "balance", server_default=sa.text("0"))
+
+
+def downgrade() -> None:
+    op.execute(
+        "UPDATE account SET balance = account.balance + unfolded.amount "
+        "FROM (SELECT account_id, sum(amount) AS amount FROM ledger_entry "
+        "WHERE NOT folded GROUP BY account_id) AS unfolded "
+        "WHERE account.id = unfolded.account_id"
+    )
+    op.alter_column("account", "balance", server_default=sa.text("1000"))
+    op.drop_index("ix_ledger_entry_unfolded", table_name="ledger_entry")
+    op.drop_index("ix_ledger_entry_account_id", table_name="ledger_entry")
+    op.drop_table("ledger_entry")
+    sa.Enum(name="ledgerreason").drop(op.get_bind())
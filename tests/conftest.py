@@ -0,0 +1,40 @@
+import asyncio
+import os
+
+import asyncpg
+import pytest
+from dotenv import load_dotenv
+from sqlalchemy.exc import DBAPIError
+
+from util import Database
+
+load_dotenv(override=True)
+
+
+@pytest.fixture
+def run_db():
+    """Run ``test(db)`` on a fresh Database with empty tables.
+
+    Tests use the DB_* settings with TEST_DB_NAME (default marketbot_test),
+    which is dropped and recreated; they are skipped when it is unreachable.
+    """
+
+    if not os.getenv("DB_USER"):
+        pytest.skip("DB_USER is not set")
+
+    def run(test):
+        async def main():
+            db = Database.from_env(db_name=os.getenv("TEST_DB_NAME", "marketbot_test"))
+            try:
+                try:
+                    await db.drop_tables()
+                    await db.create_tables()
+                except (OSError, DBAPIError, asyncpg.PostgresError) as e:
+                    pytest.skip(f"test database unavailable: {e}")
+                return await test(db)
+            finally:
+                await db.dispose()
+
+        return asyncio.run(main())
+
+    return run
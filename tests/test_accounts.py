@@ -0,0 +1,31 @@
+from util.models import LedgerEntry, LedgerReason
+
+GUILD_ID = 1
+
+
+def test_cached_account_reads_a_live_balance(run_db):
+    async def test(db):
+        async with db.async_session() as session:
+            account = await db.accounts.get_or_create(
+                session, guild_id=GUILD_ID, account_number=1, name="user"
+            )
+            starting = account.balance
+
+        # Written by another process, so this one's cache never heard of it.
+        async with db.async_session() as session:
+            session.add(
+                LedgerEntry(
+                    account_id=account.id, amount=50.0, reason=LedgerReason.GRANT
+                )
+            )
+            await session.commit()
+
+        hits = db.accounts.cache.hits
+        async with db.async_session() as session:
+            account = await db.accounts.get_or_create(
+                session, guild_id=GUILD_ID, account_number=1, name="user"
+            )
+            assert account.balance == starting + 50.0
+        assert db.accounts.cache.hits == hits + 1
+
+    run_db(test)
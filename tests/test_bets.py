@@ -0,0 +1,163 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from util.batcher import BetBatcher
+from util.managers import PollClosedError
+from util.models import Poll, PollStatus
+
+GUILD_ID = 1
+STARTING = 1000.0
+STAKE = 26.0
+
+
+async def seed(db):
+    now = datetime.now(timezone.utc)
+    async with db.async_session() as session:
+        owner = await db.accounts.create(
+            session, guild_id=GUILD_ID, account_number=1, name="owner"
+        )
+        poll = await db.polls.create(
+            session,
+            account=owner,
+            question="q",
+            reference="r",
+            guild_id=GUILD_ID,
+            channel_id=1,
+            message_id=1,
+            created_on=now,
+            lockin_by=now + timedelta(hours=1),
+        )
+        options = await db.options.create_all(session, poll=poll, options=["a", "b"])
+    db.stakes.track(poll.id, [option.index for option in options])
+    return poll, options
+
+
+async def get_account(db, session):
+    return await db.accounts.get(session, guild_id=GUILD_ID, account_number=1)
+
+
+def test_concurrent_bets_never_overdraw(run_db):
+    async def test(db):
+        poll, options = await seed(db)
+        batcher = BetBatcher(db, window=0.002, max_batch=20)
+
+        async def place(n):
+            option = options[n % 2]
+            async with db.async_session() as session:
+                account = await get_account(db, session)
+                if n % 3:
+                    balance = await db.bets.place(
+                        session, account=account, option=option, stake=STAKE
+                    )
+            if not n % 3:
+                balance = await batcher.place(account, option, STAKE)
+            if balance is not None:
+                db.stakes.add(poll.id, option.index, STAKE)
+            return balance
+
+        results = await asyncio.gather(*(place(n) for n in range(300)))
+        await batcher.wait_idle()
+
+        placed = [balance for balance in results if balance is not None]
+        assert len(placed) == int(STARTING // STAKE)
+        assert min(placed) >= 0
+
+        async with db.async_session() as session:
+            account = await get_account(db, session)
+            totals = await db.bets.get_stake_totals(session, poll=poll)
+            assert account.balance + sum(totals) == STARTING
+            assert await db.ledger.rebuild(session, account.id) == account.balance
+            rows = await db.bets.get_option_totals(session, poll_ids=[poll.id])
+        # The running totals kept as bets committed agree with the database.
+        assert db.stakes.matches(rows)
+        assert db.stakes.get(poll.id).pool == sum(totals)
+
+    run_db(test)
+
+
+def test_bets_on_locked_poll_are_rejected(run_db):
+    async def test(db):
+        poll, options = await seed(db)
+        async with db.async_session() as session:
+            assert await db.polls.claim(session, ids=[poll.id]) == [poll.id]
+
+        async with db.async_session() as session:
+            account = await get_account(db, session)
+            with pytest.raises(PollClosedError):
+                await db.bets.place(
+                    session, account=account, option=options[0], stake=STAKE
+                )
+            account = await get_account(db, session)
+            results = await db.bets.place_many(session, [(account, options[1], STAKE)])
+            assert isinstance(results[0], PollClosedError)
+            account = await get_account(db, session)
+
+        batcher = BetBatcher(db)
+        with pytest.raises(PollClosedError):
+            await batcher.place(account, options[0], STAKE)
+
+        async with db.async_session() as session:
+            account = await get_account(db, session)
+            assert account.balance == STARTING
+            assert await db.bets.get_stake_totals(session, poll=poll) == [0, 0]
+            poll = await db.polls.get_by_id(session, poll.id)
+            assert poll.status is PollStatus.LOCKED
+
+    run_db(test)
+
+
+def test_bet_waits_for_a_lock_in_progress(run_db):
+    async def test(db):
+        poll, options = await seed(db)
+        async with db.async_session() as locker, db.async_session() as session:
+            # A lock or close of the poll holds its row until it commits.
+            await locker.execute(
+                update(Poll.__table__)
+                .where(Poll.id == poll.id)
+                .values(status=PollStatus.LOCKED)
+            )
+            account = await get_account(db, session)
+            bet = asyncio.create_task(
+                db.bets.place(session, account=account, option=options[0], stake=1)
+            )
+            await asyncio.sleep(0.2)
+            assert not bet.done()
+
+            await locker.commit()
+            with pytest.raises(PollClosedError):
+                await bet
+
+    run_db(test)
+
+
+def test_stake_totals_keep_a_bet_placed_while_loading(run_db):
+    async def test(db):
+        poll, options = await seed(db)
+        db.stakes.discard(poll.id)
+        get_option_totals = db.bets.get_option_totals
+
+        async def racing_get_option_totals(session, **kwargs):
+            rows = await get_option_totals(session, **kwargs)
+            if racing_get_option_totals.calls == 0:
+                # A bet commits after the totals were read but before they
+                # are installed.
+                async with db.async_session() as other:
+                    account = await get_account(db, other)
+                    await db.bets.place(
+                        other, account=account, option=options[0], stake=STAKE
+                    )
+                db.stakes.add(poll.id, options[0].index, STAKE)
+            racing_get_option_totals.calls += 1
+            return rows
+
+        racing_get_option_totals.calls = 0
+        db.bets.get_option_totals = racing_get_option_totals
+        async with db.async_session() as session:
+            totals = await db.get_stake_totals(session, poll)
+        assert totals == [STAKE, 0.0]
+        assert racing_get_option_totals.calls == 2
+
+    run_db(test)
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from bench.fakes import FakeChannel
+from bot import MarketBot
+from util.models import PollStatus
+
+GUILD_ID = 1
+
+
+def test_sweep_locks_a_poll_this_process_never_scheduled(run_db):
+    async def test(db):
+        bot = MarketBot(command_prefix="!", intents=discord.Intents.none())
+        await bot.db.dispose()
+        bot.db = db
+        bot.lock_sweep_interval = 0.1
+        channel = FakeChannel(GUILD_ID)
+        bot.get_partial_messageable = lambda channel_id, **kwargs: channel
+
+        async def ready():
+            pass
+
+        bot.wait_until_ready = ready
+        checker = asyncio.create_task(bot.poll_status_checker())
+        try:
+            await asyncio.sleep(0.05)
+            # Created by another process after this one started, so it never
+            # reaches this process's deadline scheduler.
+            now = datetime.now(timezone.utc)
+            message = await channel.send()
+            async with db.async_session() as session:
+                owner = await db.accounts.create(
+                    session, guild_id=GUILD_ID, account_number=1, name="owner"
+                )
+                poll = await db.polls.create(
+                    session,
+                    account=owner,
+                    question="q",
+                    reference="r",
+                    guild_id=GUILD_ID,
+                    channel_id=channel.id,
+                    message_id=message.id,
+                    created_on=now - timedelta(hours=1),
+                    lockin_by=now,
+                )
+                await db.options.create_all(session, poll=poll, options=["a", "b"])
+            assert poll.id not in bot.poll_deadlines
+
+            for _ in range(50):
+                async with db.async_session() as session:
+                    poll = await db.polls.get_by_id(session, poll.id)
+                if poll.status is PollStatus.LOCKED:
+                    break
+                await asyncio.sleep(0.05)
+            assert poll.status is PollStatus.LOCKED
+
+            await bot.outbox.wait_idle()
+            assert channel.calls["send"] == 2
+        finally:
+            checker.cancel()
+            await bot.outbox.close()
+
+    run_db(test)
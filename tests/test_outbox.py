@@ -0,0 +1,91 @@
+import asyncio
+
+from util.outbox import Outbox, Priority
+
+
+def test_interactive_jobs_overtake_background_ones_in_a_channel():
+    async def main():
+        outbox = Outbox(concurrency=1)
+        gate = asyncio.Event()
+        sent = []
+
+        def job(name):
+            async def call():
+                await gate.wait()
+                sent.append(name)
+
+            return call
+
+        outbox.submit(1, job("busy"))
+        await asyncio.sleep(0)
+        for n in range(3):
+            outbox.submit(1, job(f"background {n}"))
+        outbox.submit(1, job("interactive 0"), priority=Priority.INTERACTIVE)
+        outbox.submit(1, job("interactive 1"), priority=Priority.INTERACTIVE)
+        gate.set()
+        await outbox.wait_idle()
+        await outbox.close()
+        return sent
+
+    assert asyncio.run(main()) == [
+        "busy",
+        "interactive 0",
+        "interactive 1",
+        "background 0",
+        "background 1",
+        "background 2",
+    ]
+
+
+def test_close_drains_then_cancels_what_is_left():
+    async def main():
+        outbox = Outbox(concurrency=1)
+        hang = asyncio.Event()
+
+        async def quick():
+            return "sent"
+
+        async def stuck():
+            await hang.wait()
+
+        sent = outbox.submit(1, quick)
+        await outbox.close(timeout=1)
+        assert sent.result() == "sent"
+
+        blocked = outbox.submit(1, stuck)
+        queued = outbox.submit(1, quick)
+        await outbox.close(timeout=0.05)
+        assert blocked.cancelled() and queued.cancelled()
+        assert outbox.stats.depth == 0
+
+        # The outbox starts again on the next submit.
+        assert await outbox.submit(1, quick) == "sent"
+        await outbox.close()
+
+    asyncio.run(main())
+
+
+def test_replaced_job_keeps_its_place():
+    async def main():
+        outbox = Outbox(concurrency=1)
+        gate = asyncio.Event()
+        sent = []
+
+        def job(name):
+            async def call():
+                await gate.wait()
+                sent.append(name)
+
+            return call
+
+        outbox.submit(1, job("busy"))
+        await asyncio.sleep(0)
+        outbox.submit(1, job("edit v1"), key="message")
+        outbox.submit(1, job("other"))
+        outbox.submit(1, job("edit v2"), key="message")
+        gate.set()
+        await outbox.wait_idle()
+        await outbox.close()
+        return sent
+
+    assert asyncio.run(main()) == ["busy", "edit v2", "other"]
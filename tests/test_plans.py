@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from util.models import PollStatus
+
+GUILD_ID = 1
+
+
+async def seed(db):
+    now = datetime.now(timezone.utc)
+    async with db.async_session() as session:
+        account = await db.accounts.create(
+            session, guild_id=GUILD_ID, account_number=1, name="owner"
+        )
+        for n in range(3):
+            poll = await db.polls.create(
+                session,
+                account=account,
+                question=f"q{n}",
+                reference=f"r{n}",
+                guild_id=GUILD_ID,
+                channel_id=1,
+                message_id=n,
+                created_on=now - timedelta(hours=1),
+                lockin_by=now + timedelta(minutes=n - 1),
+            )
+            options = await db.options.create_all(
+                session, poll=poll, options=["a", "b"]
+            )
+            await db.bets.place(session, account=account, option=options[0], stake=30)
+    return account, poll
+
+
+async def plans(db, call):
+    """EXPLAIN every query ``call(session)`` runs, with sequential scans,
+    bitmap scans and sorts priced out so a plan only avoids them where an
+    index can serve the query."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with db.async_session() as session:
+            await call(session)
+    finally:
+        event.remove(db.engine.sync_engine, "before_cursor_execute", record)
+
+    explained = []
+    async with db.engine.connect() as conn:
+        for setting in ("enable_seqscan", "enable_bitmapscan", "enable_sort"):
+            await conn.exec_driver_sql(f"SET {setting} = off")
+        for statement, parameters in statements:
+            rows = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            explained.append("\n".join(row[0] for row in rows))
+    return explained
+
+
+def uses(plan: str, index: str) -> bool:
+    return f" on {index}" in plan or f" using {index}" in plan
+
+
+def test_open_deadlines_and_claim_use_partial_index(run_db):
+    async def test(db):
+        await seed(db)
+        (plan,) = await plans(db, db.polls.get_open_deadlines)
+        assert uses(plan, "ix_poll_open_lockin_by"), plan
+
+        async def claim(session):
+            await db.polls.claim(session, due_by=datetime.now(timezone.utc))
+
+        (plan,) = await plans(db, claim)
+        assert uses(plan, "ix_poll_open_lockin_by"), plan
+
+    run_db(test)
+
+
+def test_bet_queries_use_indexes(run_db):
+    async def test(db):
+        account, poll = await seed(db)
+
+        async def option_totals(session):
+            await db.bets.get_option_totals(session, poll_ids=[poll.id])
+
+        (plan,) = await plans(db, option_totals)
+        assert uses(plan, "poll_option_ukey"), plan
+        assert uses(plan, "ix_bet_option_id"), plan
+
+        async def positions(session):
+            await db.bets.get_positions(session, account.id)
+
+        (plan,) = await plans(db, positions)
+        assert uses(plan, "bet_ukey"), plan
+
+    run_db(test)
+
+
+def test_account_queries_use_indexes(run_db):
+    async def test(db):
+        await seed(db)
+
+        async def get(session):
+            await db.accounts.get(session, guild_id=GUILD_ID, account_number=1)
+
+        (plan,) = await plans(db, get)
+        assert uses(plan, "account_ukey"), plan
+
+        async def ranked(session):
+            await db.accounts.get_ranked(session, guild_id=GUILD_ID, limit=10)
+
+        (plan,) = await plans(db, ranked)
+        assert uses(plan, "ix_account_guild_id_balance"), plan
+        assert "Sort" not in plan, plan
+
+    run_db(test)
+
+
+def test_poll_page_uses_index(run_db):
+    async def test(db):
+        await seed(db)
+
+        async def page(session):
+            await db.polls.get_page(
+                session, guild_id=GUILD_ID, limit=10, status=PollStatus.OPEN
+            )
+
+        (plan,) = await plans(db, page)
+        assert uses(plan, "ix_poll_guild_id_created_on"), plan
+        assert "Sort" not in plan, plan
+
+    run_db(test)
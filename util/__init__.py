@@ -1,5 +1,17 @@
+from typing import List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from .aggregates import StakeAggregates
 from .db import Database as BaseDB
-from .managers import AccountManager, PollManager, BetManager, PollOptionManager
+from .managers import (
+    AccountManager,
+    PollManager,
+    BetManager,
+    LedgerManager,
+    PollOptionManager,
+)
+from .models import Poll, PollStatus
+from .pollindex import PollIndex
+from .sharding import Shard
 
 
 __all__ = ["Database"]
@@ -11,5 +23,86 @@ class Database(BaseDB):
 
         self.accounts = AccountManager()
         self.polls = PollManager()
-        self.bets = BetManager()
+        self.bets = BetManager(self.accounts)
         self.options = PollOptionManager()
+        self.ledger = LedgerManager()
+
+        self.stakes = StakeAggregates()
+        self.poll_index = PollIndex()
+
+    def clear_caches(self) -> None:
+        self.accounts.cache.clear()
+        self.accounts.leaderboard.clear()
+        self.stakes = StakeAggregates()
+        self.poll_index.clear()
+
+    async def load_stakes(
+        self, session: AsyncSession, shard: Optional[Shard] = None
+    ) -> None:
+        rows = await self.bets.get_option_totals(
+            session, statuses=[PollStatus.OPEN, PollStatus.LOCKED], shard=shard
+        )
+        self.stakes.load(rows)
+
+    async def load_poll_index(
+        self, session: AsyncSession, shard: Optional[Shard] = None
+    ) -> None:
+        self.poll_index.load(await self.polls.get_active_options(session, shard))
+
+    async def get_stake_totals(
+        self, session: AsyncSession, poll: Poll, attempts: int = 3
+    ) -> List[float]:
+        stakes = self.stakes.get(poll.id)
+        for attempt in range(1, attempts + 1):
+            if stakes is not None:
+                break
+            # Bets are counted from before the query, so one landing during
+            # it is noticed and the totals are read again instead of lost.
+            self.stakes.begin_load(poll.id)
+            rows = await self.bets.get_option_totals(session, poll_ids=[poll.id])
+            stakes = self.stakes.finish_load(poll.id, rows, force=attempt == attempts)
+        return stakes.totals
+
+    async def fold_guild(
+        self, session: AsyncSession, guild_id: int, batch: int = 10000
+    ) -> None:
+        """Fold every committed ledger entry of ``guild_id`` into the
+        snapshot balances that rankings are read from."""
+        while True:
+            folded = await self.ledger.fold(
+                session, guild_id=guild_id, limit=batch, wait=True
+            )
+            if folded < batch:
+                return
+
+    async def get_leaderboard(
+        self, session: AsyncSession, guild_id: int, page: int, per_page: int = 10
+    ) -> List[Tuple[int, int, str, float]]:
+        """Page of ``(account_id, account_number, name, balance)`` rows by rank.
+
+        Pages inside the in-memory top N skip the database; the snapshot is
+        (re)loaded when it can no longer answer them.
+        """
+        leaderboard = self.accounts.leaderboard
+        rows = leaderboard.page(guild_id, page, per_page)
+        if rows is not None:
+            return rows
+
+        await self.fold_guild(session, guild_id)
+        if page * per_page <= leaderboard.size:
+            leaderboard.begin_load(guild_id)
+            try:
+                top = await self.accounts.get_ranked(
+                    session, guild_id=guild_id, limit=leaderboard.size + 1
+                )
+            except BaseException:
+                leaderboard.cancel_load(guild_id)
+                raise
+            leaderboard.load(guild_id, top)
+            rows = leaderboard.page(guild_id, page, per_page)
+            if rows is not None:
+                return rows
+
+        return await self.accounts.get_ranked(
+            session, guild_id=guild_id, limit=per_page, offset=(page - 1) * per_page
+        )
@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PollStakes:
+    __slots__ = ("options", "winning")
+
+    def __init__(self, indices: Iterable[int] = ()):
+        self.options: Dict[int, float] = dict.fromkeys(indices, 0.0)
+        self.winning: Optional[int] = None
+
+    @property
+    def totals(self) -> List[float]:
+        return [self.options[index] for index in sorted(self.options)]
+
+    @property
+    def pool(self) -> float:
+        return round(sum(self.options.values()), 2)
+
+    @property
+    def winner_total(self) -> float:
+        if self.winning is None:
+            return 0.0
+        return self.options.get(self.winning, 0.0)
+
+
+class StakeAggregates:
+    """Running per-option stake totals for every open or locked poll.
+
+    Totals are rebuilt from the database with ``load`` at startup and kept
+    current with ``add`` as bets commit, so rendering never needs a GROUP BY.
+    """
+
+    def __init__(self):
+        self._polls: Dict[int, PollStakes] = {}
+        # Bets counted while a poll's totals are being read, see begin_load.
+        self._loading: Dict[int, PollStakes] = {}
+
+    def __contains__(self, poll_id: int) -> bool:
+        return poll_id in self._polls
+
+    def track(self, poll_id: int, indices: Iterable[int]) -> PollStakes:
+        self._polls[poll_id] = PollStakes(indices)
+        return self._polls[poll_id]
+
+    def load(self, rows: Iterable[Tuple[int, int, float]]) -> None:
+        """Bulk (re)build from ``(poll_id, option_index, total)`` rows."""
+        for poll_id, index, total in rows:
+            stakes = self._polls.get(poll_id)
+            if stakes is None:
+                stakes = self._polls[poll_id] = PollStakes()
+            stakes.options[index] = round(total, 2)
+
+    def add(self, poll_id: int, index: int, stake: float) -> None:
+        for polls in (self._polls, self._loading):
+            stakes = polls.get(poll_id)
+            if stakes is not None:
+                stakes.options[index] = round(stakes.options.get(index, 0.0) + stake, 2)
+
+    def begin_load(self, poll_id: int) -> None:
+        """Start counting bets on ``poll_id`` before its totals are read."""
+        self._loading[poll_id] = PollStakes()
+
+    def finish_load(
+        self, poll_id: int, rows: Iterable[Tuple[int, int, float]], force: bool = False
+    ) -> Optional[PollStakes]:
+        """Install the ``(poll_id, option_index, total)`` rows read since
+        ``begin_load`` and return the poll's totals.
+
+        A bet counted in between may or may not be in the rows, so unless
+        ``force`` is set nothing is installed then and None tells the caller
+        to read them again.
+        """
+        pending = self._loading.pop(poll_id, None)
+        if not force and (pending is None or pending.options):
+            return None
+        stakes = self._polls[poll_id] = PollStakes()
+        for _, index, total in rows:
+            stakes.options[index] = round(total, 2)
+        return stakes
+
+    def get(self, poll_id: int) -> Optional[PollStakes]:
+        return self._polls.get(poll_id)
+
+    def settle(self, poll_id: int, winning_index: int) -> Optional[PollStakes]:
+        stakes = self._polls.pop(poll_id, None)
+        if stakes is not None:
+            stakes.winning = winning_index
+        return stakes
+
+    def discard(self, poll_id: int) -> None:
+        self._polls.pop(poll_id, None)
+
+    def matches(self, rows: Iterable[Tuple[int, int, float]]) -> bool:
+        """Compare the in-memory totals with ``BetManager.get_option_totals``
+        rows for the same polls."""
+        expected: Dict[int, Dict[int, float]] = {}
+        for poll_id, index, total in rows:
+            expected.setdefault(poll_id, {})[index] = round(total, 2)
+        return all(
+            poll_id in self._polls and self._polls[poll_id].options == options
+            for poll_id, options in expected.items()
+        )
@@ -0,0 +1,120 @@
+import asyncio
+import traceback
+from typing import Dict, List, Optional, Set, Union
+from util.models import Account, PollOption
+from util.readmodels import OptionView
+
+
+class _PendingBet:
+    __slots__ = ("account", "option", "stake", "future")
+
+    def __init__(
+        self,
+        account: Account,
+        option: Union[PollOption, OptionView],
+        stake: float,
+        future: asyncio.Future,
+    ):
+        self.account = account
+        self.option = option
+        self.stake = stake
+        self.future = future
+
+
+class BetBatcher:
+    """Group commit for bet placement.
+
+    Bets are queued and written ``max_batch`` at a time, or whatever has
+    queued up once ``window`` seconds have passed since the first of them,
+    as one ``BetManager.place_many`` transaction. Stakes still in the queue
+    are reserved against the account's known balance, so a bet that cannot
+    be funded is turned away without waiting; the database still has the
+    final say.
+    """
+
+    def __init__(self, db, window: float = 0.005, max_batch: int = 100):
+        self.db = db
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[_PendingBet] = []
+        self._reserved: Dict[int, float] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    def available(self, account: Account) -> float:
+        return account.balance - self._reserved.get(account.id, 0.0)
+
+    async def place(
+        self,
+        account: Account,
+        option: Union[PollOption, OptionView],
+        stake: float,
+    ) -> Optional[float]:
+        """Queue a bet and return the balance left once its batch committed,
+        or None when the account cannot fund it. Raises PollClosedError
+        when the poll stopped taking bets first."""
+        if self.available(account) < stake:
+            return None
+
+        self._reserved[account.id] = self._reserved.get(account.id, 0.0) + stake
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_PendingBet(account, option, stake, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_flush)
+
+        # The bet commits with its batch even if the caller goes away.
+        return await asyncio.shield(future)
+
+    async def wait_idle(self) -> None:
+        """Flush whatever is queued and wait for every batch in flight."""
+        self._start_flush()
+        while self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[_PendingBet]) -> None:
+        try:
+            async with self.db.async_session() as session:
+                results = await self.db.bets.place_many(
+                    session, [(bet.account, bet.option, bet.stake) for bet in batch]
+                )
+        except Exception as e:
+            traceback.print_exc()
+            self._release(batch)
+            for bet in batch:
+                if not bet.future.done():
+                    bet.future.set_exception(e)
+            return
+
+        # Released only now, when the committed balance already includes them.
+        self._release(batch)
+        for bet, result in zip(batch, results):
+            if bet.future.done():
+                continue
+            if isinstance(result, Exception):
+                bet.future.set_exception(result)
+            else:
+                bet.future.set_result(result)
+
+    def _release(self, batch: List[_PendingBet]) -> None:
+        for bet in batch:
+            remaining = self._reserved[bet.account.id] - bet.stake
+            if remaining > 0.005:
+                self._reserved[bet.account.id] = remaining
+            else:
+                del self._reserved[bet.account.id]
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+import discord
+from discord import app_commands
+
+
+def _scope_key(guild_id: Optional[int]) -> str:
+    return "global" if guild_id is None else str(guild_id)
+
+
+def tree_hash(tree: app_commands.CommandTree, guild_id: Optional[int] = None) -> str:
+    """Stable hash of the payload ``tree.sync`` would send for one scope."""
+    guild = None if guild_id is None else discord.Object(id=guild_id)
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command["type"], command["name"]),
+    )
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class CommandSync:
+    """Syncs the command tree only for the scopes whose commands changed
+    since the last sync recorded in ``path``."""
+
+    def __init__(
+        self,
+        tree: app_commands.CommandTree,
+        path: str,
+        guild_ids: Optional[List[int]] = None,
+    ):
+        self.tree = tree
+        self.path = path
+        self.scopes: List[Optional[int]] = [None, *(guild_ids or [])]
+
+    def load(self) -> Dict[str, str]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self, hashes: Dict[str, str]) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(hashes, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    async def sync(self, force: bool = False) -> List[Optional[int]]:
+        """Sync every changed scope (all of them with ``force``) and return
+        the guild ids synced, None standing for the global scope."""
+        stored = self.load()
+        synced = []
+        for guild_id in self.scopes:
+            key = _scope_key(guild_id)
+            current = tree_hash(self.tree, guild_id)
+            if not force and stored.get(key) == current:
+                continue
+
+            guild = None if guild_id is None else discord.Object(id=guild_id)
+            await self.tree.sync(guild=guild)
+            # Recorded per scope, so a failure further on keeps this one.
+            stored[key] = current
+            self.save(stored)
+            synced.append(guild_id)
+        return synced
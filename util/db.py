@@ -1,4 +1,13 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import itertools
+import os
+from typing import Hashable, List, Optional
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    create_async_engine,
+    async_sessionmaker,
+)
+from util.cache import TTLCache
+from util.instrumentation import QueryStats, TimedQueuePool
 from util.models import Base
 
 
@@ -10,16 +19,83 @@ class Database:
         passwd: str,
         host: str = "localhost",
         port: int = 5432,
+        echo: bool = False,
+        replicas: Optional[List[str]] = None,
+        read_your_writes: float = 5.0,
     ):
         self.engine = create_async_engine(
-            f"postgresql+asyncpg://{user}:{passwd}@{host}:{port}/{db_name}", echo=True
+            f"postgresql+asyncpg://{user}:{passwd}@{host}:{port}/{db_name}",
+            echo=echo,
+            poolclass=TimedQueuePool,
         )
+        self.stats = QueryStats()
+        self.stats.attach(self.engine)
 
         self.async_session = async_sessionmaker(
             self.engine,
             expire_on_commit=False,
         )
 
+        # Replicas only ever see read-only transactions; every write goes
+        # through async_session on the primary.
+        self.replica_engines = [
+            create_async_engine(
+                url.replace("postgresql://", "postgresql+asyncpg://", 1),
+                echo=echo,
+                poolclass=TimedQueuePool,
+                execution_options={"postgresql_readonly": True},
+            )
+            for url in replicas or []
+        ]
+        for engine in self.replica_engines:
+            self.stats.attach(engine)
+        self._replica_sessions = itertools.cycle(
+            [
+                async_sessionmaker(engine, expire_on_commit=False)
+                for engine in self.replica_engines
+            ]
+            or [self.async_session]
+        )
+        self._recent_writes = TTLCache(maxsize=65536, ttl=read_your_writes)
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        options = dict(
+            user=os.getenv("DB_USER"),
+            passwd=os.getenv("DB_PASSWD"),
+            db_name=os.getenv("DB_NAME"),
+            host=os.getenv("DB_HOST"),
+            port=os.getenv("DB_PORT"),
+            echo=os.getenv("DB_ECHO", "").lower() in ("1", "true", "yes"),
+            replicas=[
+                url.strip()
+                for url in os.getenv("DB_REPLICA_URLS", "").split(",")
+                if url.strip()
+            ],
+            read_your_writes=float(os.getenv("DB_READ_YOUR_WRITES", 5)),
+        )
+        options.update(kwargs)
+        return cls(**options)
+
+    def wrote(self, key: Hashable) -> None:
+        """Pin ``read_session(key)`` to the primary for the read-your-writes window."""
+        self._recent_writes.set(key, True)
+
+    def read_session(self, key: Optional[Hashable] = None) -> AsyncSession:
+        """Session for read-only queries on the next replica in turn.
+
+        Falls back to the primary when no replicas are configured or when
+        ``key`` was passed to ``wrote`` recently enough that a replica may
+        not have replayed it yet.
+        """
+        if key is not None and self._recent_writes.get(key):
+            return self.async_session()
+        return next(self._replica_sessions)()
+
+    async def dispose(self) -> None:
+        for engine in [self.engine, *self.replica_engines]:
+            await engine.dispose()
+
     async def create_tables(self) -> None:
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
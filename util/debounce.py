@@ -0,0 +1,54 @@
+import asyncio
+import traceback
+from typing import Awaitable, Callable, Dict, Hashable, Set
+
+
+class Debouncer:
+    """Coalesces repeated updates to the same key into at most one flush per window.
+
+    ``mark_dirty`` is cheap and may be called for every event; the flush callback
+    runs later and is expected to render whatever the latest state is.
+    """
+
+    def __init__(
+        self, flush: Callable[[Hashable], Awaitable[None]], window: float = 2.0
+    ):
+        self.flush = flush
+        self.window = window
+        self._dirty: Set[Hashable] = set()
+        self._last_flush: Dict[Hashable, float] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def mark_dirty(self, key: Hashable) -> None:
+        self._dirty.add(key)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    def discard(self, key: Hashable) -> None:
+        self._dirty.discard(key)
+        self._last_flush.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    async def wait_idle(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _run(self, key: Hashable) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while key in self._dirty:
+                delay = self._last_flush.get(key, 0) + self.window - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                self._dirty.discard(key)
+                self._last_flush[key] = loop.time()
+                try:
+                    await self.flush(key)
+                except Exception:
+                    traceback.print_exc()
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
@@ -1,105 +1,168 @@
 import discord
+from collections import OrderedDict
 from datetime import datetime
-from typing import List
-from util.models import Poll, PollOption
+from typing import List, Optional, Sequence, Tuple
+from util.aggregates import PollStakes
+from util.models import Poll, PollOption, PollStatus
+from util.odds import implied_probabilities, payout_multipliers
+
+PERCENT_BARS = tuple(
+    "`|`" + ":green_square:" * segments + ":red_square:" * (10 - segments) + "`|`"
+    for segments in range(11)
+)
+
+STATUS_LABELS = {
+    PollStatus.OPEN: "OPEN",
+    PollStatus.LOCKED: "LOCKED",
+    PollStatus.FINALIZED: "CLOSED",
+}
 
 
 def percentBar(stake):
-    segments = round(stake * 10)
-    return (
-        "`|`" + ":green_square:" * (segments) + ":red_square:" * (10 - segments) + "`|`"
-    )
+    return PERCENT_BARS[round(stake * 10)]
 
 
 class poll_embed_maker:
-    @classmethod
-    def new_poll(
-        cls, prize: float, poll: Poll, options: List[PollOption]
-    ) -> discord.Embed:
-        embed = discord.Embed(title=f"[OPEN] {poll.question}")
-        embed.description = f"Poll created by: {poll.account.name}"
-        prefixed_options = [
-            f":number_{option.index}: `{option.value}`"
-            for option in sorted(options, key=lambda option: option.index)
-        ]
-        embed.add_field(name="Options", value="\n".join(prefixed_options))
-        embed.add_field(
-            name="Stake Share (%)",
-            value="\n".join(list(map(percentBar, [0 for _ in options]))),
-        )
-        embed.add_field(
-            name="Amount", value="\n".join([f"`${0:.2f}`" for _ in options])
-        )
-        embed.add_field(
-            name="Place your stake with:",
-            value=f"`/poll bet {poll.id} [option_number] [stake]`",
-            inline=False,
-        )
-        footer = [
-            f"Minimum buy in: ${prize*0.25:.2f}",
-            f"Prize pool: ${prize:.2f}",
-            "Lock in by: "
-            + datetime.strftime(poll.lockin_by.astimezone(), "%-m/%-d/%y %-I:%M %p"),
-        ]
-        embed.set_footer(text="\n".join(footer))
-        return embed
+    # (poll id, message id) -> (option lines, "Lock in by" footer line); both
+    # never change. Poll ids start over after a /reset, message ids never do.
+    _poll_lines: "OrderedDict[Tuple[int, int], Tuple[List[str], str]]" = OrderedDict()
+    _poll_lines_size = 1024
 
     @classmethod
-    def update_open_poll(
-        cls, prize: float, original: discord.Embed, poll: Poll, stakes: List[float]
-    ):
-        total_stake = sum(stakes)
-        if total_stake > 0:
-            normal_stakes = [stake / total_stake for stake in stakes]
-            original.set_field_at(
-                1,
-                name="Stake Share (%)",
-                value="\n".join(list(map(percentBar, normal_stakes))),
-            )
-            original.set_field_at(
-                2,
-                name="Amount",
-                value="\n".join([f"`${stake:.2f}`" for stake in stakes]),
-            )
-            footer = [
-                f"Minimum buy in: ${prize*0.25:.2f}",
-                f"Prize pool: ${prize:.2f} + ${total_stake:.2f} (${prize + total_stake:.2f})",
+    def _lines(cls, poll: Poll, options: List[PollOption]) -> Tuple[List[str], str]:
+        key = (poll.id, poll.message_id)
+        lines = cls._poll_lines.get(key)
+        if lines is None:
+            lines = (
+                [
+                    f":number_{option.index}: `{option.value}`"
+                    for option in sorted(options, key=lambda option: option.index)
+                ],
                 "Lock in by: "
                 + datetime.strftime(
                     poll.lockin_by.astimezone(), "%-m/%-d/%y %-I:%M %p"
                 ),
-            ]
-            original.set_footer(text="\n".join(footer))
-        return original
+            )
+            cls._poll_lines[key] = lines
+            if len(cls._poll_lines) > cls._poll_lines_size:
+                cls._poll_lines.popitem(last=False)
+        else:
+            cls._poll_lines.move_to_end(key)
+        return lines
 
     @classmethod
-    def lock_open_poll(cls, original: discord.Embed, poll: Poll) -> discord.Embed:
-        original.title = original.title.replace("[OPEN]", "[LOCKED]")
-        original.set_field_at(
-            3,
-            name="Close the poll with:",
-            value=f"`/poll close {poll.id} [winning_number]`",
-            inline=False,
+    def render(
+        cls,
+        prize: float,
+        poll: Poll,
+        options: List[PollOption],
+        stakes: List[float],
+        winning_index: Optional[int] = None,
+    ) -> discord.Embed:
+        """Build the full poll message embed for the poll's current status."""
+        option_lines, lockin_line = cls._lines(poll, options)
+        if winning_index is not None:
+            option_lines = [
+                line + " :trophy:" if index == winning_index else line
+                for index, line in enumerate(option_lines, start=1)
+            ]
+
+        embed = discord.Embed(title=f"[{STATUS_LABELS[poll.status]}] {poll.question}")
+        embed.description = f"Poll created by: {poll.account.name}"
+        embed.add_field(name="Options", value="\n".join(option_lines))
+
+        total_stake = sum(stakes)
+        if total_stake > 0:
+            prize_line = (
+                f"Prize pool: ${prize:.2f} + ${total_stake:.2f} "
+                f"(${prize + total_stake:.2f})"
+            )
+        else:
+            prize_line = f"Prize pool: ${prize:.2f}"
+
+        shares = implied_probabilities(stakes)
+        embed.add_field(
+            name="Stake Share (%)", value="\n".join(map(percentBar, shares))
         )
-        total_stake, _ = original.footer.text.split("\n")
-        footer = [
-            total_stake,
-        ]
-        original.set_footer(text="\n".join(footer))
-        return original
+        amounts = [f"`${stake:.2f}`" for stake in stakes]
+        if poll.status is not PollStatus.FINALIZED:
+            # What a winning option would pay per $1 staked at current stakes.
+            amounts = [
+                f"{amount} `x{multiplier:.2f}`" if multiplier else amount
+                for amount, multiplier in zip(
+                    amounts, payout_multipliers(prize, stakes)
+                )
+            ]
+        embed.add_field(name="Amount", value="\n".join(amounts))
+
+        if poll.status is PollStatus.OPEN:
+            embed.add_field(
+                name="Place your stake with:",
+                value=f"`/poll bet {poll.id} [option_number] [stake]`",
+                inline=False,
+            )
+            footer = [f"Minimum buy in: ${prize * 0.25:.2f}", prize_line, lockin_line]
+        elif poll.status is PollStatus.LOCKED:
+            embed.add_field(
+                name="Close the poll with:",
+                value=f"`/poll close {poll.id} [winning_number]`",
+                inline=False,
+            )
+            footer = [prize_line]
+        else:
+            footer = [prize_line]
+
+        embed.set_footer(text="\n".join(footer))
+        return embed
 
     @classmethod
-    def closed_poll(cls, poll: Poll, winning_option: PollOption) -> discord.Embed:
+    def closed_poll(
+        cls,
+        poll: Poll,
+        winning_option: PollOption,
+        paid: int,
+        payout: float,
+        stakes: Optional[PollStakes] = None,
+    ) -> discord.Embed:
         embed = discord.Embed(title=f"The poll `{poll.question:.45}` has finalized")
         embed.url = poll.reference
         embed.add_field(
             name="Winning Outcome",
             value=f":number_{winning_option.index}: `{winning_option.value}`",
         )
+        if stakes is not None:
+            embed.add_field(
+                name="Staked",
+                value=f"`${stakes.winner_total:.2f}` of `${stakes.pool:.2f}` on the winner",
+            )
+        embed.add_field(name="Paid Out", value=f"`${payout:.2f}` to {paid} betters")
         return embed
 
     @classmethod
-    def close_locked_poll(cls, original: discord.Embed) -> discord.Embed:
-        original.title = original.title.replace("[LOCKED]", "[CLOSED]")
-        original.remove_field(3)
-        return original
+    def poll_list(cls, rows: Sequence, page: int) -> discord.Embed:
+        """Embed for one page of ``PollManager.get_page`` rows."""
+        embed = discord.Embed(title="Polls")
+        if not rows:
+            embed.description = "No polls found."
+            return embed
+
+        embed.add_field(
+            name="Poll",
+            value="\n".join(
+                f"`{row.id}` [`{row.question:.30}`]({row.reference})" for row in rows
+            ),
+        )
+        embed.add_field(
+            name="Status",
+            value="\n".join(
+                f"{STATUS_LABELS[row.status]} <t:{int(row.lockin_by.timestamp())}:R>"
+                if row.status is PollStatus.OPEN
+                else STATUS_LABELS[row.status]
+                for row in rows
+            ),
+        )
+        embed.add_field(
+            name="Pool", value="\n".join(f"`${row.pool:.2f}`" for row in rows)
+        )
+        embed.set_footer(text=f"Page {page}")
+        return embed
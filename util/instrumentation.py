@@ -0,0 +1,227 @@
+import functools
+import inspect
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Optional, Sequence
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+UNLABELLED = "<unlabelled>"
+
+_operation: ContextVar[str] = ContextVar("db_operation", default=UNLABELLED)
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket it falls in."""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class OperationStats:
+    __slots__ = ("latency", "statements", "rows", "commits")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statements = 0
+        self.rows = 0
+        self.commits = 0
+
+
+class QueryStats:
+    """Statement timings, row counts and pool usage collected from engine events.
+
+    Statements are grouped by the manager method that issued them (see
+    ``instrumented``); anything else lands under ``<unlabelled>``.
+    """
+
+    def __init__(self):
+        self.operations: Dict[str, OperationStats] = {}
+        self.pool_wait = Histogram()
+        self.pool_checked_out = 0
+        self.pool_peak = 0
+        self.pool_capacity = 0
+
+    def attach(self, engine: AsyncEngine) -> None:
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_execute)
+        event.listen(sync_engine, "commit", self._commit)
+
+        pool = sync_engine.pool
+        if isinstance(pool, TimedQueuePool):
+            pool.stats = self
+            self.pool_capacity += pool.size() + max(pool._max_overflow, 0)
+        event.listen(pool, "checkout", self._checkout)
+        event.listen(pool, "checkin", self._checkin)
+
+    def operation(self, name: str) -> OperationStats:
+        stats = self.operations.get(name)
+        if stats is None:
+            stats = self.operations[name] = OperationStats()
+        return stats
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, many):
+        elapsed = perf_counter() - conn.info["query_start"].pop()
+        stats = self.operation(_operation.get())
+        stats.latency.observe(elapsed)
+        stats.statements += 1
+        if cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+
+    def _commit(self, conn):
+        self.operation(_operation.get()).commits += 1
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.pool_checked_out += 1
+        self.pool_peak = max(self.pool_peak, self.pool_checked_out)
+
+    def _checkin(self, dbapi_connection, connection_record):
+        self.pool_checked_out = max(self.pool_checked_out - 1, 0)
+
+    @property
+    def pool_saturation(self) -> float:
+        if not self.pool_capacity:
+            return 0.0
+        return self.pool_checked_out / self.pool_capacity
+
+    def totals(self) -> Dict[str, int]:
+        return {
+            "statements": sum(op.statements for op in self.operations.values()),
+            "rows": sum(op.rows for op in self.operations.values()),
+            "commits": sum(op.commits for op in self.operations.values()),
+        }
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            "operations": {
+                name: {
+                    "statements": op.statements,
+                    "rows": op.rows,
+                    "commits": op.commits,
+                    "mean_ms": op.latency.mean * 1000,
+                    "p50_ms": op.latency.quantile(0.5) * 1000,
+                    "p95_ms": op.latency.quantile(0.95) * 1000,
+                    "p99_ms": op.latency.quantile(0.99) * 1000,
+                    "max_ms": op.latency.max * 1000,
+                }
+                for name, op in sorted(self.operations.items())
+            },
+            "pool": {
+                "checked_out": self.pool_checked_out,
+                "peak": self.pool_peak,
+                "capacity": self.pool_capacity,
+                "saturation": self.pool_saturation,
+                "wait_p95_ms": self.pool_wait.quantile(0.95) * 1000,
+                "wait_max_ms": self.pool_wait.max * 1000,
+            },
+        }
+
+    def dump(self) -> str:
+        snapshot = self.snapshot()
+        lines = [
+            f"{'operation':<40} {'stmts':>7} {'rows':>8} {'commits':>7} "
+            f"{'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'maxms':>7}"
+        ]
+        for name, op in snapshot["operations"].items():
+            lines.append(
+                f"{name:<40.40} {op['statements']:>7} {op['rows']:>8} "
+                f"{op['commits']:>7} {op['p50_ms']:>7.2f} {op['p95_ms']:>7.2f} "
+                f"{op['p99_ms']:>7.2f} {op['max_ms']:>7.2f}"
+            )
+        pool = snapshot["pool"]
+        lines.append(
+            f"pool: {pool['checked_out']}/{pool['capacity']} checked out "
+            f"(peak {pool['peak']}, {pool['saturation']:.0%}), "
+            f"wait p95 {pool['wait_p95_ms']:.2f}ms max {pool['wait_max_ms']:.2f}ms"
+        )
+        return "\n".join(lines)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports how long each checkout waited for a connection."""
+
+    stats: Optional[QueryStats] = None
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats is not None:
+                self.stats.pool_wait.observe(perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def instrumented(cls):
+    """Label every statement issued by a manager's coroutine methods with
+    ``ClassName.method`` so QueryStats can group them."""
+    for name, func in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(func):
+            continue
+        setattr(cls, name, _label(f"{cls.__name__}.{name}", func))
+    return cls
+
+
+def _label(label: str, func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _operation.set(label)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _operation.reset(token)
+
+    return wrapper
@@ -0,0 +1,126 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (account_id, account_number, name, balance)
+Entry = Tuple[int, int, str, float]
+
+
+def _rank_key(account_id: int, balance: float) -> Tuple[float, int]:
+    # Matches ORDER BY balance DESC, id ASC.
+    return (-balance, account_id)
+
+
+class GuildRanking:
+    __slots__ = ("entries", "bound", "_ordered")
+
+    def __init__(self):
+        self.entries: Dict[int, Entry] = {}
+        # Best rank key any account outside ``entries`` could have, or None
+        # when every account of the guild is in ``entries``.
+        self.bound: Optional[Tuple[float, int]] = None
+        self._ordered: Optional[List[Entry]] = None
+
+    @property
+    def ordered(self) -> List[Entry]:
+        if self._ordered is None:
+            self._ordered = sorted(
+                self.entries.values(), key=lambda entry: _rank_key(entry[0], entry[3])
+            )
+        return self._ordered
+
+    def _exclude(self, key: Tuple[float, int]) -> None:
+        if self.bound is None or key < self.bound:
+            self.bound = key
+
+
+class Leaderboard:
+    """Top ``size`` accounts of each guild by balance, kept current in memory.
+
+    A guild is loaded from the database on first use and then updated from
+    every committed balance change. Entries are only kept while they provably
+    rank ahead of every account outside the snapshot, so a page is either
+    exact or not served at all.
+    """
+
+    def __init__(self, size: int = 100):
+        self.size = size
+        self._guilds: Dict[int, GuildRanking] = {}
+        self._loading: Dict[int, List[Entry]] = {}
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._guilds
+
+    def clear(self) -> None:
+        self._guilds.clear()
+        self._loading.clear()
+
+    def begin_load(self, guild_id: int) -> None:
+        """Buffer updates for ``guild_id`` until ``load`` installs its snapshot."""
+        self._guilds.pop(guild_id, None)
+        self._loading.setdefault(guild_id, [])
+
+    def cancel_load(self, guild_id: int) -> None:
+        self._loading.pop(guild_id, None)
+
+    def load(self, guild_id: int, rows: Iterable[Entry]) -> None:
+        """Install the first ``size + 1`` rows of the guild in rank order."""
+        rows = list(rows)
+        ranking = GuildRanking()
+        for account_id, account_number, name, balance in rows[: self.size]:
+            ranking.entries[account_id] = (account_id, account_number, name, balance)
+        if len(rows) > self.size:
+            account_id, _, _, balance = rows[self.size]
+            ranking.bound = _rank_key(account_id, balance)
+
+        self._guilds[guild_id] = ranking
+        for entry in self._loading.pop(guild_id, []):
+            self.update(guild_id, *entry)
+
+    def update(
+        self,
+        guild_id: int,
+        account_id: int,
+        account_number: int,
+        name: str,
+        balance: float,
+    ) -> None:
+        ranking = self._guilds.get(guild_id)
+        if ranking is None:
+            pending = self._loading.get(guild_id)
+            if pending is not None:
+                pending.append((account_id, account_number, name, balance))
+            return
+
+        entry = ranking.entries.get(account_id)
+        if entry == (account_id, account_number, name, balance):
+            return
+
+        ranking._ordered = None
+        key = _rank_key(account_id, balance)
+        if ranking.bound is not None and key > ranking.bound:
+            ranking.entries.pop(account_id, None)
+            return
+
+        ranking.entries[account_id] = (account_id, account_number, name, balance)
+        if len(ranking.entries) > self.size:
+            worst = ranking.ordered[-1]
+            del ranking.entries[worst[0]]
+            ranking._exclude(_rank_key(worst[0], worst[3]))
+            ranking._ordered = None
+
+    def remove(self, guild_id: int, account_id: int) -> None:
+        ranking = self._guilds.get(guild_id)
+        if ranking is not None and ranking.entries.pop(account_id, None):
+            ranking._ordered = None
+
+    def page(self, guild_id: int, page: int, per_page: int) -> Optional[List[Entry]]:
+        """Entries ranked ``(page - 1) * per_page`` onwards, or None if the
+        snapshot can't answer and the database has to."""
+        ranking = self._guilds.get(guild_id)
+        if ranking is None:
+            return None
+
+        start = (page - 1) * per_page
+        end = start + per_page
+        if ranking.bound is not None and end > len(ranking.entries):
+            return None
+        return ranking.ordered[start:end]
@@ -1,11 +1,73 @@
-from datetime import datetime
-from typing import Optional, List
-from sqlalchemy import select, delete, func
+from datetime import datetime, timezone
+from typing import Optional, List, Tuple, Union
+from sqlalchemy import (
+    BIGINT,
+    Integer,
+    any_,
+    Row,
+    cast,
+    column,
+    select,
+    delete,
+    func,
+    literal,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import (
+    contains_eager,
+    joinedload,
+    selectinload,
+)
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
+from util import odds
+from util.cache import TTLCache
+from util.instrumentation import instrumented
+from util.leaderboard import Leaderboard
 from util.models import *
+from util.readmodels import OpenPollView, OptionView, PollView, PositionView
+from util.sharding import Shard
 
 
+STARTING_BALANCE = 1000.0
+
+# Advisory lock namespaces (first key of pg_advisory_xact_lock(int, int)).
+ACCOUNT_DEBIT_LOCK = 1
+LEDGER_FOLD_LOCK = 2
+
+
+class PollClosedError(Exception):
+    """The poll stopped taking bets before the bet was written."""
+
+
+@instrumented
 class AccountManager:
+    def __init__(
+        self,
+        cache: Optional[TTLCache] = None,
+        leaderboard: Optional[Leaderboard] = None,
+    ):
+        self.cache = cache if cache is not None else TTLCache()
+        self.leaderboard = leaderboard if leaderboard is not None else Leaderboard()
+
+    def remember(self, account: Account) -> None:
+        self.cache.set(
+            (account.guild_id, account.account_number), (account.id, account.name)
+        )
+        self.leaderboard.update(
+            account.guild_id,
+            account.id,
+            account.account_number,
+            account.name,
+            account.balance,
+        )
+
+    def forget(self, guild_id: int, account_number: int) -> None:
+        self.cache.pop((guild_id, account_number))
+
     async def create(
         self,
         session: AsyncSession,
@@ -15,12 +77,14 @@ class AccountManager:
         name: str,
         balance: Optional[float] = None,
     ) -> Account:
-        account = Account(
-            guild_id=guild_id, account_number=account_number, name=name, balance=balance
-        )
+        account = Account(guild_id=guild_id, account_number=account_number, name=name)
+        grant = STARTING_BALANCE if balance is None else balance
+        if grant:
+            LedgerEntry(account=account, amount=grant, reason=LedgerReason.GRANT)
 
         session.add(account)
         await session.commit()
+        set_committed_value(account, "balance", grant)
         return account
 
     async def get(
@@ -35,7 +99,7 @@ class AccountManager:
         )
 
         query = await session.execute(stmt)
-        return query.unique().scalars().one_or_none()
+        return query.scalars().one_or_none()
 
     async def get_or_create(
         self,
@@ -46,21 +110,34 @@ class AccountManager:
         name: str,
         balance: Optional[float] = None,
     ) -> Account:
+        cached = self.cache.get((guild_id, account_number))
+        if cached is not None and cached[1] == name:
+            # Only the identity is cached; the balance moves with every bet,
+            # payout and fold in any process, so the row is read live.
+            account = await session.get(Account, cached[0])
+            if account is not None:
+                return account
+            self.forget(guild_id, account_number)
+
         account = await self.get(
             session, guild_id=guild_id, account_number=account_number
         )
         if account:
             if account.name != name:
-                self.update(session, account, name=name)
+                await self.update(session, account, name=name)
+            else:
+                self.remember(account)
             return account
         else:
-            return await self.create(
+            account = await self.create(
                 session,
                 guild_id=guild_id,
                 account_number=account_number,
                 name=name,
                 balance=balance,
             )
+            self.remember(account)
+            return account
 
     async def delete(
         self,
@@ -69,13 +146,55 @@ class AccountManager:
         guild_id: int,
         account_number: int,
     ) -> None:
-        stmt = delete(Account).where(
-            Account.guild_id == guild_id,
-            Account.account_number == account_number,
+        account = select(Account.id).where(
+            Account.guild_id == guild_id, Account.account_number == account_number
+        )
+        await session.execute(
+            delete(LedgerEntry).where(
+                LedgerEntry.account_id.in_(account.scalar_subquery())
+            )
+        )
+        stmt = (
+            delete(Account)
+            .where(
+                Account.guild_id == guild_id,
+                Account.account_number == account_number,
+            )
+            .returning(Account.id)
         )
 
-        await session.execute(stmt)
+        account_ids = (await session.execute(stmt)).scalars().all()
         await session.commit()
+        self.forget(guild_id, account_number)
+        for account_id in account_ids:
+            self.leaderboard.remove(guild_id, account_id)
+
+    async def get_ranked(
+        self,
+        session: AsyncSession,
+        *,
+        guild_id: int,
+        limit: int,
+        offset: int = 0,
+    ) -> List[Tuple[int, int, str, float]]:
+        """Accounts of ``guild_id`` ranked by their snapshot balance, which
+        ix_account_guild_id_balance serves; fold the guild's ledger first
+        for the ranking to be current."""
+        stmt = (
+            select(
+                Account.id,
+                Account.account_number,
+                Account.name,
+                Account.snapshot_balance,
+            )
+            .where(Account.guild_id == guild_id)
+            .order_by(Account.snapshot_balance.desc(), Account.id.asc())
+            .limit(limit)
+            .offset(offset)
+        )
+
+        query = await session.execute(stmt)
+        return query.all()
 
     async def update(
         self,
@@ -85,20 +204,20 @@ class AccountManager:
         guild_id: Optional[int] = None,
         account_number: Optional[int] = None,
         name: Optional[str] = None,
-        balance: Optional[float] = None,
     ) -> None:
+        self.forget(account.guild_id, account.account_number)
         if guild_id is not None:
             account.guild_id = guild_id
         if account_number is not None:
             account.account_number = account_number
         if name is not None:
             account.name = name
-        if balance is not None:
-            account.balance = balance
 
         await session.commit()
+        self.remember(account)
 
 
+@instrumented
 class PollManager:
     async def create(
         self,
@@ -107,6 +226,9 @@ class PollManager:
         account: Account,
         question: str,
         reference: str,
+        guild_id: int,
+        channel_id: int,
+        message_id: int,
         created_on: datetime,
         lockin_by: datetime,
         finalized_on: Optional[datetime] = None,
@@ -118,6 +240,9 @@ class PollManager:
             lockin_by=lockin_by,
             finalized_on=finalized_on,
             reference=reference,
+            guild_id=guild_id,
+            channel_id=channel_id,
+            message_id=message_id,
         )
 
         session.add(poll)
@@ -129,18 +254,169 @@ class PollManager:
     ) -> Optional[Poll]:
         stmt = (
             select(Poll)
-            .join(Poll.account)
-            .where(Account.guild_id == guild_id, Poll.id == id)
+            .where(Poll.guild_id == guild_id, Poll.id == id)
+            .options(joinedload(Poll.account), selectinload(Poll.options))
+        )
+
+        query = await session.execute(stmt)
+        return query.scalars().one_or_none()
+
+    async def get_by_id(self, session: AsyncSession, id: int) -> Optional[Poll]:
+        stmt = (
+            select(Poll)
+            .where(Poll.id == id)
+            .options(joinedload(Poll.account), selectinload(Poll.options))
         )
 
         query = await session.execute(stmt)
-        return query.unique().scalars().one_or_none()
+        return query.scalars().one_or_none()
 
     async def get_all(self, session: AsyncSession, *, status: PollStatus) -> List[Poll]:
         stmt = select(Poll).where(Poll.status == status)
 
         query = await session.execute(stmt)
-        return query.unique().scalars().all()
+        return query.scalars().all()
+
+    async def get_open_deadlines(
+        self,
+        session: AsyncSession,
+        shard: Optional[Shard] = None,
+        *,
+        poll_ids: Optional[List[int]] = None,
+    ) -> List[OpenPollView]:
+        stmt = select(Poll.id, Poll.lockin_by).where(Poll.status == PollStatus.OPEN)
+        if poll_ids is not None:
+            stmt = stmt.where(Poll.id.in_(poll_ids))
+        if shard is not None and shard.is_sharded:
+            stmt = stmt.where(shard.where(Poll.guild_id))
+
+        query = await session.execute(stmt)
+        return [OpenPollView(*row) for row in query]
+
+    async def get_active_options(
+        self, session: AsyncSession, shard: Optional[Shard] = None
+    ) -> List[Tuple[int, int, str, PollStatus, int, str]]:
+        stmt = (
+            select(
+                Poll.guild_id,
+                Poll.id,
+                Poll.question,
+                Poll.status,
+                PollOption.index,
+                PollOption.value,
+            )
+            .join(Poll.options)
+            .where(Poll.status.in_([PollStatus.OPEN, PollStatus.LOCKED]))
+            .order_by(Poll.id, PollOption.index)
+        )
+        if shard is not None and shard.is_sharded:
+            stmt = stmt.where(shard.where(Poll.guild_id))
+
+        query = await session.execute(stmt)
+        return query.all()
+
+    async def claim(
+        self,
+        session: AsyncSession,
+        *,
+        ids: Optional[List[int]] = None,
+        due_by: Optional[datetime] = None,
+        shard: Optional[Shard] = None,
+        limit: int = 100,
+    ) -> List[int]:
+        """Move OPEN polls to LOCKED and return the ids this call moved.
+
+        Rows another process is already claiming are skipped rather than
+        waited on, and the status check in the UPDATE makes the transition
+        happen once no matter how many processes race for it.
+        """
+        due = select(Poll.id).where(Poll.status == PollStatus.OPEN)
+        if ids is not None:
+            due = due.where(Poll.id.in_(ids))
+        if due_by is not None:
+            due = due.where(Poll.lockin_by <= due_by)
+        if shard is not None and shard.is_sharded:
+            due = due.where(shard.where(Poll.guild_id))
+        due = (
+            due.order_by(Poll.lockin_by).limit(limit).with_for_update(skip_locked=True)
+        )
+
+        stmt = (
+            update(Poll.__table__)
+            .where(Poll.id.in_(due.scalar_subquery()), Poll.status == PollStatus.OPEN)
+            .values(status=PollStatus.LOCKED)
+            .returning(Poll.id)
+        )
+
+        claimed = (await session.execute(stmt)).scalars().all()
+        await session.commit()
+        return claimed
+
+    async def get_view(
+        self, session: AsyncSession, guild_id: int, id: int
+    ) -> Optional[PollView]:
+        stmt = (
+            select(
+                Poll.id,
+                Poll.status,
+                Poll.question,
+                Poll.reference,
+                PollOption.id,
+                PollOption.poll_id,
+                PollOption.index,
+                PollOption.value,
+            )
+            .join(Poll.options)
+            .where(Poll.guild_id == guild_id, Poll.id == id)
+            .order_by(PollOption.index.asc())
+        )
+
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return None
+        return PollView(*rows[0][:4], tuple(OptionView(*row[4:]) for row in rows))
+
+    async def get_page(
+        self,
+        session: AsyncSession,
+        *,
+        guild_id: int,
+        limit: int,
+        status: Optional[PollStatus] = None,
+        account_number: Optional[int] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Row]:
+        """Newest-first page of ``(id, question, status, lockin_by, reference,
+        created_on, pool)`` rows, continuing after the ``(created_on, id)`` of
+        the last row of the previous page."""
+        pool = (
+            select(func.coalesce(func.sum(Bet.stake), 0))
+            .join(Bet.option)
+            .where(PollOption.poll_id == Poll.id)
+            .scalar_subquery()
+        )
+        stmt = select(
+            Poll.id,
+            Poll.question,
+            Poll.status,
+            Poll.lockin_by,
+            Poll.reference,
+            Poll.created_on,
+            pool.label("pool"),
+        ).where(Poll.guild_id == guild_id)
+        if status is not None:
+            stmt = stmt.where(Poll.status == status)
+        if account_number is not None:
+            stmt = stmt.join(Poll.account).where(
+                Account.account_number == account_number
+            )
+        if before is not None:
+            stmt = stmt.where(tuple_(Poll.created_on, Poll.id) < tuple_(*before))
+
+        stmt = stmt.order_by(Poll.created_on.desc(), Poll.id.desc()).limit(limit)
+
+        query = await session.execute(stmt)
+        return query.all()
 
     async def update(
         self,
@@ -170,7 +446,11 @@ class PollManager:
         await session.commit()
 
 
+@instrumented
 class BetManager:
+    def __init__(self, accounts: AccountManager):
+        self.accounts = accounts
+
     async def create(
         self,
         session: AsyncSession,
@@ -185,13 +465,160 @@ class BetManager:
         await session.commit()
         return bet
 
+    async def place(
+        self,
+        session: AsyncSession,
+        *,
+        account: Account,
+        option: Union[PollOption, OptionView],
+        stake: float,
+    ) -> Optional[float]:
+        """Debit ``stake`` and add it to the bet, returning the balance left
+        or None when the account cannot fund it.
+
+        Raises PollClosedError once the poll is no longer open.
+        """
+        # Debits of one account are serialised so the funds check below sees
+        # every earlier debit; nothing locks the account row itself.
+        await session.execute(
+            select(func.pg_advisory_xact_lock(ACCOUNT_DEBIT_LOCK, account.id))
+        )
+        # The share lock holds off a lock or close of the poll until this
+        # bet has committed, and makes this bet wait for one in progress.
+        stmt = select(Poll.status).where(Poll.id == option.poll_id)
+        status = (await session.execute(stmt.with_for_update(read=True))).scalar_one()
+        if status is not PollStatus.OPEN:
+            await session.rollback()
+            raise PollClosedError(option.poll_id)
+
+        stmt = select(Account.balance).where(Account.id == account.id)
+        balance = (await session.execute(stmt)).scalar_one()
+        if balance < stake:
+            await session.rollback()
+            return None
+
+        debit = (
+            insert(LedgerEntry)
+            .values(
+                account_id=account.id,
+                amount=-stake,
+                reason=LedgerReason.BET,
+                poll_id=option.poll_id,
+            )
+            .cte("debit")
+        )
+        upsert = insert(Bet).values(
+            account_id=account.id, option_id=option.id, stake=stake
+        )
+        upsert = upsert.on_conflict_do_update(
+            constraint="bet_ukey", set_={"stake": Bet.stake + upsert.excluded.stake}
+        ).add_cte(debit)
+        await session.execute(upsert)
+
+        await session.commit()
+        balance = round(balance - stake, 2)
+        set_committed_value(account, "balance", balance)
+        self.accounts.remember(account)
+        return balance
+
+    async def place_many(
+        self,
+        session: AsyncSession,
+        bets: List[Tuple[Account, Union[PollOption, OptionView], float]],
+    ) -> List[Union[float, None, PollClosedError]]:
+        """Place several bets in one transaction, like ``place`` for each.
+
+        Bets are funded in the given order; each result is the balance left
+        after that bet, None when it was rejected for lack of funds, or a
+        PollClosedError when its poll no longer takes bets.
+        """
+        account_ids = sorted({account.id for account, _, _ in bets})
+        ids = values(column("id", Integer), name="ids").data(
+            [(account_id,) for account_id in account_ids]
+        )
+        ordered = select(ids.c.id).order_by(ids.c.id).subquery()
+        await session.execute(
+            select(func.pg_advisory_xact_lock(ACCOUNT_DEBIT_LOCK, ordered.c.id))
+        )
+        stmt = (
+            select(Poll.id)
+            .where(
+                Poll.id.in_(sorted({option.poll_id for _, option, _ in bets})),
+                Poll.status == PollStatus.OPEN,
+            )
+            .order_by(Poll.id)
+            .with_for_update(read=True)
+        )
+        open_polls = set((await session.execute(stmt)).scalars().all())
+        stmt = select(Account.id, Account.balance).where(Account.id.in_(account_ids))
+        balances = dict((await session.execute(stmt)).all())
+
+        results = []
+        entries = []
+        stakes = {}
+        for account, option, stake in bets:
+            if option.poll_id not in open_polls:
+                results.append(PollClosedError(option.poll_id))
+                continue
+            balance = balances[account.id]
+            if balance < stake:
+                results.append(None)
+                continue
+
+            balance = balances[account.id] = round(balance - stake, 2)
+            results.append(balance)
+            entries.append((account.id, -stake, option.poll_id))
+            key = (account.id, option.id)
+            stakes[key] = stakes.get(key, 0) + stake
+
+        if not entries:
+            await session.rollback()
+            return results
+
+        # A single upsert may not touch the same bet twice, hence the totals.
+        debits = values(
+            column("account_id", Integer),
+            column("amount", LedgerEntry.amount.type),
+            column("poll_id", Integer),
+            name="debits",
+        ).data(entries)
+        debit = (
+            insert(LedgerEntry)
+            .from_select(
+                ["account_id", "amount", "reason", "poll_id"],
+                select(
+                    debits.c.account_id,
+                    debits.c.amount,
+                    literal(LedgerReason.BET, LedgerEntry.reason.type),
+                    debits.c.poll_id,
+                ),
+            )
+            .cte("debit")
+        )
+        upsert = insert(Bet).values(
+            [
+                {"account_id": account_id, "option_id": option_id, "stake": stake}
+                for (account_id, option_id), stake in stakes.items()
+            ]
+        )
+        upsert = upsert.on_conflict_do_update(
+            constraint="bet_ukey", set_={"stake": Bet.stake + upsert.excluded.stake}
+        ).add_cte(debit)
+        await session.execute(upsert)
+
+        await session.commit()
+        for account, _, _ in bets:
+            set_committed_value(account, "balance", balances[account.id])
+            self.accounts.remember(account)
+        return results
+
     async def get(
         self, session: AsyncSession, account: Account, option: PollOption
     ) -> Optional[Bet]:
         stmt = select(Bet).where(Bet.account == account, Bet.option == option)
 
         query = await session.execute(stmt)
-        return query.unique().scalars().one_or_none()
+        return query.scalars().one_or_none()
 
     async def get_all_active_by_account(
         self, session: AsyncSession, account: Account
@@ -199,17 +626,39 @@ class BetManager:
         stmt = (
             select(Bet)
             .join(Bet.option)
-            .join(Bet.account)
             .join(PollOption.poll)
             .where(Bet.account == account, Poll.status != PollStatus.FINALIZED)
             .order_by(Poll.created_on.asc())
+            .options(contains_eager(Bet.option).contains_eager(PollOption.poll))
         )
 
         query = await session.execute(stmt)
-        bets = query.unique().scalars().all()
+        bets = query.scalars().all()
 
         return bets
 
+    async def get_positions(
+        self, session: AsyncSession, account_id: int
+    ) -> List[PositionView]:
+        stmt = (
+            select(
+                Poll.id,
+                Poll.question,
+                Poll.reference,
+                PollOption.index,
+                PollOption.value,
+                Bet.stake,
+            )
+            .select_from(Bet)
+            .join(Bet.option)
+            .join(PollOption.poll)
+            .where(Bet.account_id == account_id, Poll.status != PollStatus.FINALIZED)
+            .order_by(Poll.created_on.asc())
+        )
+
+        query = await session.execute(stmt)
+        return [PositionView(*row) for row in query]
+
     async def get_stake_totals(
         self, session: AsyncSession, *, poll: Poll, winners: Optional[bool] = None
     ) -> List[float]:
@@ -219,22 +668,121 @@ class BetManager:
         else:
             stmt = stmt.where(PollOption.poll == poll, PollOption.winning == winners)
 
-        stmt = stmt.group_by(PollOption.id)
+        stmt = stmt.group_by(PollOption.id).order_by(PollOption.index.asc())
 
         query = await session.execute(stmt)
         stakes = query.scalars().all()
         stakes = [stake if stake is not None else 0 for stake in stakes]
         return stakes
 
-    async def get_winning_bets(self, session: AsyncSession, *, poll: Poll) -> List[Bet]:
+    async def get_option_totals(
+        self,
+        session: AsyncSession,
+        *,
+        poll_ids: Optional[List[int]] = None,
+        statuses: Optional[List[PollStatus]] = None,
+        shard: Optional[Shard] = None,
+    ) -> List[Tuple[int, int, float]]:
+        stmt = select(
+            PollOption.poll_id,
+            PollOption.index,
+            func.coalesce(func.sum(Bet.stake), 0),
+        ).outerjoin(PollOption.bets)
+        if poll_ids is not None:
+            stmt = stmt.where(PollOption.poll_id.in_(poll_ids))
+        if statuses is not None or (shard is not None and shard.is_sharded):
+            stmt = stmt.join(PollOption.poll)
+        if statuses is not None:
+            stmt = stmt.where(Poll.status.in_(statuses))
+        if shard is not None and shard.is_sharded:
+            stmt = stmt.where(shard.where(Poll.guild_id))
+
+        stmt = stmt.group_by(PollOption.id)
+
+        query = await session.execute(stmt)
+        return query.all()
+
+    async def settle(
+        self,
+        session: AsyncSession,
+        *,
+        poll: Poll,
+        winning_option: PollOption,
+        prize: float,
+    ) -> Optional[Tuple[int, float]]:
+        """Finalize ``poll`` and pay out the winners, or return None when
+        another close already finalized it."""
+        # The conditional update serialises overlapping closes on the poll
+        # row; only the one that flips the status pays anything out.
+        finalized_on = datetime.now(timezone.utc)
         stmt = (
-            select(Bet)
+            update(Poll.__table__)
+            .where(Poll.id == poll.id, Poll.status != PollStatus.FINALIZED)
+            .values(status=PollStatus.FINALIZED, finalized_on=finalized_on)
+            .returning(Poll.id)
+        )
+        if (await session.execute(stmt)).scalar_one_or_none() is None:
+            await session.rollback()
+            return None
+        set_committed_value(poll, "status", PollStatus.FINALIZED)
+        set_committed_value(poll, "finalized_on", finalized_on)
+
+        winning_option.winning = True
+        await session.flush()
+
+        total_stmt = (
+            select(func.coalesce(func.sum(Bet.stake), 0))
             .join(Bet.option)
-            .where(PollOption.poll_id == poll.id, PollOption.winning == True)
+            .where(PollOption.poll_id == poll.id)
+        )
+        total_stake = (await session.execute(total_stmt)).scalar_one()
+        stmt = (
+            select(Bet.account_id, Bet.stake)
+            .where(Bet.option_id == winning_option.id)
+            .order_by(Bet.id)
         )
+        bets = (await session.execute(stmt)).all()
+
+        winners = []
+        payouts = []
+        if bets:
+            account_ids = [account_id for account_id, _ in bets]
+            pool = int(odds.to_cents([prize + total_stake])[0])
+            cents = odds.split_pool(pool, odds.to_cents([stake for _, stake in bets]))
+            # Array parameters keep this at a handful of binds for any poll size.
+            account_ids = literal(account_ids, ARRAY(Integer))
+            rows = select(
+                func.unnest(account_ids).label("account_id"),
+                func.unnest(literal(cents.tolist(), ARRAY(BIGINT))).label("cents"),
+            ).subquery()
+            stmt = (
+                insert(LedgerEntry)
+                .from_select(
+                    ["account_id", "amount", "reason", "poll_id"],
+                    select(
+                        rows.c.account_id,
+                        cast(rows.c.cents, LedgerEntry.amount.type) / 100,
+                        literal(LedgerReason.PAYOUT, LedgerEntry.reason.type),
+                        literal(poll.id),
+                    ),
+                )
+                .returning(LedgerEntry.account_id, LedgerEntry.amount)
+            )
+            payouts = (await session.execute(stmt)).all()
 
-        query = await session.execute(stmt)
-        return query.unique().scalars().all()
+            stmt = select(
+                Account.id,
+                Account.guild_id,
+                Account.account_number,
+                Account.name,
+                Account.balance,
+            ).where(Account.id == any_(account_ids))
+            winners = (await session.execute(stmt)).all()
+
+        await session.commit()
+        for winner in winners:
+            self.accounts.remember(winner)
+        return len(payouts), sum(amount for _, amount in payouts)
 
     async def update(
         self,
@@ -255,6 +803,83 @@ class BetManager:
         await session.commit()
 
 
+@instrumented
+class LedgerManager:
+    async def fold(
+        self,
+        session: AsyncSession,
+        *,
+        guild_id: Optional[int] = None,
+        limit: int = 10000,
+        wait: bool = False,
+    ) -> int:
+        """Add up to ``limit`` unfolded entries, oldest first, to their
+        account's snapshot balance and return how many were folded.
+
+        Only one fold runs at a time; unless ``wait`` is set, a fold that
+        finds another one running returns 0 straight away. Folding entries
+        in id order keeps every snapshot non-negative, because a debit only
+        ever relied on entries with lower ids.
+        """
+        if wait:
+            await session.execute(
+                select(func.pg_advisory_xact_lock(LEDGER_FOLD_LOCK, 0))
+            )
+        else:
+            locked = await session.execute(
+                select(func.pg_try_advisory_xact_lock(LEDGER_FOLD_LOCK, 0))
+            )
+            if not locked.scalar_one():
+                await session.rollback()
+                return 0
+
+        batch = select(LedgerEntry.id).where(~LedgerEntry.folded)
+        if guild_id is not None:
+            batch = batch.where(
+                LedgerEntry.account_id.in_(
+                    select(Account.id).where(Account.guild_id == guild_id)
+                )
+            )
+        batch = batch.order_by(LedgerEntry.id).limit(limit).scalar_subquery()
+        folded = (
+            update(LedgerEntry.__table__)
+            .where(LedgerEntry.id.in_(batch), ~LedgerEntry.folded)
+            .values(folded=True)
+            .returning(LedgerEntry.account_id, LedgerEntry.amount)
+            .cte("folded")
+        )
+        totals = (
+            select(
+                folded.c.account_id,
+                func.sum(folded.c.amount).label("amount"),
+                func.count().label("entries"),
+            )
+            .group_by(folded.c.account_id)
+            .subquery("totals")
+        )
+        stmt = (
+            update(Account.__table__)
+            .where(Account.id == totals.c.account_id)
+            .values(balance=Account.snapshot_balance + totals.c.amount)
+            .returning(totals.c.entries)
+        )
+
+        entries = (await session.execute(stmt)).scalars().all()
+        await session.commit()
+        return sum(entries)
+
+    async def rebuild(self, session: AsyncSession, account_id: int) -> float:
+        """Balance of ``account_id`` replayed from its full history."""
+        total = func.sum(LedgerEntry.amount, type_=LedgerEntry.amount.type)
+        stmt = select(func.coalesce(total, 0)).where(
+            LedgerEntry.account_id == account_id
+        )
+
+        query = await session.execute(stmt)
+        return query.scalar_one()
+
+
+@instrumented
 class PollOptionManager:
     async def create(
         self,
@@ -298,7 +923,7 @@ class PollOptionManager:
         )
 
         query = await session.execute(stmt)
-        return query.unique().scalars().one_or_none()
+        return query.scalars().one_or_none()
 
     async def get_all(
         self,
@@ -314,7 +939,7 @@ class PollOptionManager:
         )
 
         query = await session.execute(stmt)
-        return query.unique().scalars().all()
+        return query.scalars().all()
 
     async def delete(self, session: AsyncSession, poll: Poll, index: int) -> None:
         stmt = delete(PollOption).where(
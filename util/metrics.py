@@ -0,0 +1,164 @@
+import asyncio
+import math
+from collections import Counter
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+from aiohttp import web
+from util.instrumentation import Histogram
+
+PREFIX = "marketbot"
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metrics:
+    """Process metrics rendered in the Prometheus text exposition format.
+
+    Histograms reuse ``instrumentation.Histogram``; gauges are callbacks
+    read at scrape time so nothing has to push values into them.
+    """
+
+    def __init__(self):
+        self.commands: Dict[str, Histogram] = {}
+        self.command_errors: Counter = Counter()
+        self.loops: Dict[str, Histogram] = {}
+        self.loop_lag = Histogram(LAG_BUCKETS)
+        self._gauges: List[Tuple[str, str, Callable[[], Dict[Tuple, float]]]] = []
+        self._histograms: List[Tuple[str, str, Callable[[], Histogram]]] = []
+
+    def observe_command(self, command: str, seconds: float) -> None:
+        histogram = self.commands.get(command)
+        if histogram is None:
+            histogram = self.commands[command] = Histogram()
+        histogram.observe(seconds)
+
+    def command_error(self, command: str, error: str) -> None:
+        self.command_errors[(command, error)] += 1
+
+    def observe_loop(self, loop: str, seconds: float) -> None:
+        histogram = self.loops.get(loop)
+        if histogram is None:
+            histogram = self.loops[loop] = Histogram()
+        histogram.observe(seconds)
+
+    def gauge(
+        self, name: str, help: str, read: Callable[[], Dict[Tuple, float]]
+    ) -> None:
+        """Register a gauge read at scrape time as ``{label pairs: value}``."""
+        self._gauges.append((name, help, read))
+
+    def histogram(self, name: str, help: str, read: Callable[[], Histogram]) -> None:
+        """Register a histogram kept elsewhere, read at scrape time."""
+        self._histograms.append((name, help, read))
+
+    async def monitor_loop_lag(self, interval: float = 0.5) -> None:
+        """Record how late the event loop wakes a sleeper, forever."""
+        while True:
+            start = perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag.observe(max(perf_counter() - start - interval, 0.0))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        self._histogram_lines(
+            lines,
+            "command_duration_seconds",
+            "Application command latency by command.",
+            {(("command", name),): h for name, h in self.commands.items()},
+        )
+        self._header(
+            lines, "command_errors_total", "counter", "Failed application commands."
+        )
+        for (command, error), count in sorted(self.command_errors.items()):
+            labels = _labels({"command": command, "error": error})
+            lines.append(f"{PREFIX}_command_errors_total{labels} {count}")
+        self._histogram_lines(
+            lines,
+            "loop_iteration_seconds",
+            "Duration of one iteration of a background loop.",
+            {(("loop", name),): h for name, h in self.loops.items()},
+        )
+        self._histogram_lines(
+            lines,
+            "event_loop_lag_seconds",
+            "How late the asyncio event loop woke a periodic sleeper.",
+            {(): self.loop_lag},
+        )
+        for name, help, read in self._histograms:
+            self._histogram_lines(lines, name, help, {(): read()})
+        for name, help, read in self._gauges:
+            self._header(lines, name, "gauge", help)
+            for labels, value in read().items():
+                lines.append(f"{PREFIX}_{name}{_labels(dict(labels))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str, help: str) -> None:
+        lines.append(f"# HELP {PREFIX}_{name} {help}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+    def _histogram_lines(
+        self,
+        lines: List[str],
+        name: str,
+        help: str,
+        histograms: Dict[Tuple, Histogram],
+    ) -> None:
+        self._header(lines, name, "histogram", help)
+        for labels, histogram in sorted(histograms.items()):
+            labels = dict(labels)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                bucket = _labels({**labels, "le": _number(bound)})
+                lines.append(f"{PREFIX}_{name}_bucket{bucket} {cumulative}")
+            bucket = _labels({**labels, "le": "+Inf"})
+            lines.append(f"{PREFIX}_{name}_bucket{bucket} {histogram.count}")
+            lines.append(
+                f"{PREFIX}_{name}_sum{_labels(labels)} {_number(histogram.sum)}"
+            )
+            lines.append(f"{PREFIX}_{name}_count{_labels(labels)} {histogram.count}")
+
+
+class MetricsServer:
+    """Serves ``Metrics.render`` at ``/metrics`` on the bot's own loop."""
+
+    def __init__(self, metrics: Metrics, host: str = "127.0.0.1", port: int = 9100):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self.metrics.render(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
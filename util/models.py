@@ -1,10 +1,24 @@
 import enum
 import sqlalchemy as sa
 from datetime import datetime
-from typing import List
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-
-__all__ = ["Account", "Bet", "Poll", "PollOption", "PollStatus"]
+from typing import List, Optional
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    column_property,
+    mapped_column,
+    relationship,
+)
+
+__all__ = [
+    "Account",
+    "Bet",
+    "LedgerEntry",
+    "LedgerReason",
+    "Poll",
+    "PollOption",
+    "PollStatus",
+]
 
 
 class Base(DeclarativeBase):
@@ -17,8 +31,15 @@ class PollStatus(enum.Enum):
     FINALIZED = "finalized"
 
 
+class LedgerReason(enum.Enum):
+    BET = "bet"
+    PAYOUT = "payout"
+    GRANT = "grant"
+
+
 class Account(Base):
     __tablename__ = "account"
+    __mapper_args__ = {"eager_defaults": True}
     __table_args__ = (
         sa.CheckConstraint("balance >= 0"),
         sa.UniqueConstraint("guild_id", "account_number", "name", name="account_ukey"),
@@ -31,16 +52,28 @@ class Account(Base):
     created_on: Mapped[datetime] = mapped_column(
         sa.DateTime(timezone=True), server_default=sa.func.now()
     )
-    balance: Mapped[float] = mapped_column(
-        sa.NUMERIC(19, 2, asdecimal=False), server_default=sa.text("1000")
+    # Sum of every folded ledger entry; see Account.balance for the live value.
+    snapshot_balance: Mapped[float] = mapped_column(
+        "balance", sa.NUMERIC(19, 2, asdecimal=False), server_default=sa.text("0")
     )
 
     bets: Mapped[List["Bet"]] = relationship(
-        back_populates="account", cascade="all, delete-orphan", lazy="joined"
+        back_populates="account", cascade="all, delete-orphan", lazy="raise_on_sql"
     )
     polls: Mapped[List["Poll"]] = relationship(
-        back_populates="account", cascade="all, delete-orphan", lazy="joined"
+        back_populates="account", cascade="all, delete-orphan", lazy="raise_on_sql"
     )
+    ledger_entries: Mapped[List["LedgerEntry"]] = relationship(
+        back_populates="account", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
+
+
+sa.Index(
+    "ix_account_guild_id_balance",
+    Account.guild_id,
+    Account.snapshot_balance.desc(),
+    Account.id,
+)
 
 
 class Bet(Base):
@@ -48,6 +81,7 @@ class Bet(Base):
     __table_args__ = (
         sa.UniqueConstraint("account_id", "option_id", name="bet_ukey"),
         sa.CheckConstraint("stake > 0"),
+        sa.Index("ix_bet_option_id", "option_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -59,10 +93,10 @@ class Bet(Base):
     stake: Mapped[float] = mapped_column(sa.NUMERIC(19, 2, asdecimal=False))
 
     account: Mapped["Account"] = relationship(
-        back_populates="bets", cascade="all", lazy="joined", innerjoin=True
+        back_populates="bets", cascade="all", lazy="raise_on_sql", innerjoin=True
     )
     option: Mapped["PollOption"] = relationship(
-        back_populates="bets", cascade="all", lazy="joined", innerjoin=True
+        back_populates="bets", cascade="all", lazy="raise_on_sql", innerjoin=True
     )
 
 
@@ -71,6 +105,12 @@ class Poll(Base):
     __table_args__ = (
         sa.CheckConstraint("lockin_by > created_on"),
         sa.CheckConstraint("finalized_on > created_on"),
+        sa.Index("ix_poll_status", "status"),
+        sa.Index(
+            "ix_poll_open_lockin_by",
+            "lockin_by",
+            postgresql_where=sa.text("status = 'OPEN'"),
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -83,18 +123,29 @@ class Poll(Base):
         sa.DateTime(timezone=True), server_default=sa.text("'infinity'::timestamp")
     )
     reference: Mapped[str] = mapped_column(sa.String(100), unique=True)
+    guild_id: Mapped[int] = mapped_column(sa.BIGINT)
+    channel_id: Mapped[int] = mapped_column(sa.BIGINT, index=True)
+    message_id: Mapped[int] = mapped_column(sa.BIGINT, unique=True)
 
     options: Mapped[List["PollOption"]] = relationship(
         back_populates="poll",
         cascade="all, delete-orphan",
-        lazy="joined",
+        lazy="raise_on_sql",
         innerjoin=True,
     )
     account: Mapped["Account"] = relationship(
-        back_populates="polls", cascade="all", lazy="joined", innerjoin=True
+        back_populates="polls", cascade="all", lazy="raise_on_sql", innerjoin=True
     )
 
 
+sa.Index(
+    "ix_poll_guild_id_created_on",
+    Poll.guild_id,
+    Poll.created_on.desc(),
+    Poll.id.desc(),
+)
+
+
 class PollOption(Base):
     __tablename__ = "poll_option"
     __table_args__ = (
@@ -109,8 +160,48 @@ class PollOption(Base):
     winning: Mapped[bool] = mapped_column(sa.Boolean, server_default=sa.text("False"))
 
     bets: Mapped[List["Bet"]] = relationship(
-        back_populates="option", cascade="all, delete-orphan", lazy="joined"
+        back_populates="option", cascade="all, delete-orphan", lazy="raise_on_sql"
     )
     poll: Mapped["Poll"] = relationship(
-        back_populates="options", cascade="all", lazy="joined", innerjoin=True
+        back_populates="options", cascade="all", lazy="raise_on_sql", innerjoin=True
+    )
+
+
+class LedgerEntry(Base):
+    __tablename__ = "ledger_entry"
+    __table_args__ = (
+        sa.Index("ix_ledger_entry_account_id", "account_id", "id"),
+        sa.Index(
+            "ix_ledger_entry_unfolded",
+            "account_id",
+            postgresql_where=sa.text("NOT folded"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(sa.BIGINT, primary_key=True)
+    account_id: Mapped[int] = mapped_column(sa.ForeignKey("account.id"))
+    amount: Mapped[float] = mapped_column(sa.NUMERIC(19, 2, asdecimal=False))
+    reason: Mapped[LedgerReason]
+    poll_id: Mapped[Optional[int]] = mapped_column(sa.ForeignKey("poll.id"))
+    created_on: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now()
+    )
+    # Set once the amount has been added to account.balance by a fold.
+    folded: Mapped[bool] = mapped_column(sa.Boolean, server_default=sa.text("False"))
+
+    account: Mapped["Account"] = relationship(
+        back_populates="ledger_entries", lazy="raise_on_sql", innerjoin=True
+    )
+
+
+# Live balance: the snapshot plus every entry not folded into it yet.
+Account.balance = column_property(
+    sa.type_coerce(
+        Account.snapshot_balance
+        + sa.select(sa.func.coalesce(sa.func.sum(LedgerEntry.amount), 0))
+        .where(LedgerEntry.account_id == Account.id, sa.not_(LedgerEntry.folded))
+        .correlate_except(LedgerEntry)
+        .scalar_subquery(),
+        sa.NUMERIC(19, 2, asdecimal=False),
     )
+)
@@ -0,0 +1,54 @@
+import numpy as np
+from typing import Sequence, Union
+
+# Pari-mutuel math on whole stake vectors. Money is handled in integer
+# cents so a settled pool is paid out to the exact cent.
+
+Amounts = Union[Sequence[float], np.ndarray]
+
+
+def to_cents(amounts: Amounts) -> np.ndarray:
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def implied_probabilities(stakes: Amounts) -> np.ndarray:
+    """Each option's share of the staked pool, all zeros while it is empty."""
+    stakes = np.asarray(stakes, dtype=np.float64)
+    total = stakes.sum()
+    if total <= 0:
+        return np.zeros_like(stakes)
+    return stakes / total
+
+
+def payout_multipliers(prize: float, stakes: Amounts) -> np.ndarray:
+    """Amount paid per unit staked on each option if it wins, given the
+    stakes so far; zero for options nobody has backed yet."""
+    stakes = np.asarray(stakes, dtype=np.float64)
+    pool = prize + stakes.sum()
+    return np.divide(pool, stakes, out=np.zeros_like(stakes), where=stakes > 0)
+
+
+def split_pool(pool_cents: int, stake_cents: np.ndarray) -> np.ndarray:
+    """Split ``pool_cents`` between bets in proportion to ``stake_cents``.
+
+    Every bet gets the floor of its exact share and the cents left over go
+    one each to the largest remainders, earlier bets first on ties, so the
+    result always adds up to exactly ``pool_cents``.
+    """
+    stake_cents = np.asarray(stake_cents, dtype=np.int64)
+    total = int(stake_cents.sum())
+    if total <= 0:
+        return np.zeros_like(stake_cents)
+
+    # stake * pool fits in int64 for any realistic pool; fall back to
+    # Python ints rather than overflow silently.
+    if int(stake_cents.max()) * pool_cents >= 2**63:
+        stake_cents = stake_cents.astype(object)
+    weighted = stake_cents * pool_cents
+    shares, remainders = weighted // total, weighted % total
+
+    leftover = pool_cents - int(shares.sum())
+    if leftover:
+        order = np.argsort(-remainders.astype(np.float64), kind="stable")
+        shares[order[:leftover]] += 1
+    return shares.astype(np.int64)
@@ -0,0 +1,192 @@
+import asyncio
+import enum
+import itertools
+import traceback
+from collections import deque
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+from util.instrumentation import Histogram
+
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class _Job:
+    __slots__ = ("channel_id", "key", "priority", "call", "future", "queued_at")
+
+    def __init__(self, channel_id, key, priority, call, future, queued_at):
+        self.channel_id = channel_id
+        self.key = key
+        self.priority = priority
+        self.call = call
+        self.future = future
+        self.queued_at = queued_at
+
+
+class OutboxStats:
+    __slots__ = ("latency", "queued", "peak", "sent", "replaced", "failed")
+
+    def __init__(self):
+        # Time from submit until the REST call returned, rate-limit waits included.
+        self.latency = Histogram()
+        self.queued = {priority: 0 for priority in Priority}
+        self.peak = 0
+        self.sent = 0
+        self.replaced = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        return sum(self.queued.values())
+
+    def dump(self) -> str:
+        queued = ", ".join(
+            f"{priority.name.lower()} {count}"
+            for priority, count in self.queued.items()
+        )
+        return (
+            f"outbox: {self.depth} queued ({queued}), peak {self.peak}, "
+            f"{self.sent} sent, {self.replaced} replaced, {self.failed} failed, "
+            f"latency p50 {self.latency.quantile(0.5) * 1000:.2f}ms "
+            f"p95 {self.latency.quantile(0.95) * 1000:.2f}ms "
+            f"max {self.latency.max * 1000:.2f}ms"
+        )
+
+
+class Outbox:
+    """Queues outbound REST calls per channel and runs them on a bounded worker pool.
+
+    Calls for one channel run one at a time, interactive ones first and each
+    priority in submission order, which keeps them inside that channel's
+    route bucket; discord.py still handles the actual 429s. Different channels
+    run concurrently. A queued call submitted with the same ``key`` as a newer
+    one is replaced, so only the latest edit of a message is sent.
+    """
+
+    def __init__(self, concurrency: int = 8):
+        self.concurrency = concurrency
+        self.stats = OutboxStats()
+        self._channels: Dict[int, Deque[_Job]] = {}
+        self._keyed: Dict[Hashable, _Job] = {}
+        self._busy: set = set()
+        self._ready: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._order = itertools.count()
+
+    def submit(
+        self,
+        channel_id: int,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        key: Optional[Hashable] = None,
+        priority: Priority = Priority.BACKGROUND,
+    ) -> asyncio.Future:
+        self._start()
+        loop = asyncio.get_running_loop()
+
+        job = self._keyed.get(key) if key is not None else None
+        if job is not None:
+            job.call = call
+            self.stats.replaced += 1
+            if priority < job.priority:
+                self.stats.queued[job.priority] -= 1
+                self.stats.queued[priority] += 1
+                job.priority = priority
+                self._schedule(channel_id)
+            return job.future
+
+        job = _Job(
+            channel_id, key, priority, call, loop.create_future(), perf_counter()
+        )
+        if key is not None:
+            self._keyed[key] = job
+        self._channels.setdefault(channel_id, deque()).append(job)
+        self.stats.queued[priority] += 1
+        self.stats.peak = max(self.stats.peak, self.stats.depth)
+        self._idle.clear()
+        self._schedule(channel_id)
+        return job.future
+
+    async def wait_idle(self) -> None:
+        await self._idle.wait()
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers, first giving queued calls up to ``timeout``
+        seconds to go out; calls still queued after that are cancelled."""
+        if timeout is not None and self._workers:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._ready = None
+
+        for jobs in self._channels.values():
+            for job in jobs:
+                self.stats.queued[job.priority] -= 1
+                job.future.cancel()
+        self._channels.clear()
+        self._keyed.clear()
+        self._busy.clear()
+        self._idle.set()
+
+    def _start(self) -> None:
+        if self._ready is None:
+            self._ready = asyncio.PriorityQueue()
+            self._workers = [
+                asyncio.create_task(self._work()) for _ in range(self.concurrency)
+            ]
+
+    def _schedule(self, channel_id: int) -> None:
+        # Stale entries (channel busy or drained) are skipped by the workers.
+        jobs = self._channels.get(channel_id)
+        if jobs and channel_id not in self._busy:
+            priority = min(job.priority for job in jobs)
+            self._ready.put_nowait((priority, next(self._order), channel_id))
+
+    async def _work(self) -> None:
+        while True:
+            _, _, channel_id = await self._ready.get()
+            jobs = self._channels.get(channel_id)
+            if not jobs or channel_id in self._busy:
+                continue
+
+            # First of the highest-priority jobs; channel queues stay short
+            # because repeated edits of a message replace each other.
+            job = min(jobs, key=lambda job: job.priority)
+            jobs.remove(job)
+            if job.key is not None:
+                del self._keyed[job.key]
+            self.stats.queued[job.priority] -= 1
+            self._busy.add(channel_id)
+            try:
+                result = await job.call()
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as error:
+                traceback.print_exc()
+                self.stats.failed += 1
+                if not job.future.done():
+                    job.future.set_exception(error)
+                    job.future.exception()
+            else:
+                self.stats.sent += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.stats.latency.observe(perf_counter() - job.queued_at)
+                self._busy.discard(channel_id)
+                if jobs:
+                    self._schedule(channel_id)
+                else:
+                    del self._channels[channel_id]
+                    if not self._channels:
+                        self._idle.set()
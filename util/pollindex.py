@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from util.models import PollStatus
+
+
+class IndexedPoll:
+    __slots__ = ("id", "question", "folded", "status", "options")
+
+    def __init__(
+        self,
+        id: int,
+        question: str,
+        status: PollStatus,
+        options: Optional[List[Tuple[int, str]]] = None,
+    ):
+        self.id = id
+        self.question = question
+        self.folded = question.casefold()
+        self.status = status
+        self.options: List[Tuple[int, str]] = options or []
+
+
+class PollIndex:
+    """Open and locked polls of every guild, for command autocomplete.
+
+    Filled with ``load`` at startup and kept current as polls are created,
+    locked and closed, so a keystroke never needs a query.
+    """
+
+    def __init__(self):
+        self._guilds: Dict[int, Dict[int, IndexedPoll]] = {}
+        self._guild_of: Dict[int, int] = {}
+
+    def clear(self) -> None:
+        self._guilds.clear()
+        self._guild_of.clear()
+
+    def load(self, rows: Iterable[Tuple[int, int, str, PollStatus, int, str]]) -> None:
+        """Bulk (re)build from ``(guild_id, poll_id, question, status,
+        option_index, option_value)`` rows ordered by poll id and index."""
+        for guild_id, poll_id, question, status, index, value in rows:
+            poll = self._guilds.get(guild_id, {}).get(poll_id)
+            if poll is None:
+                poll = self.add(guild_id, poll_id, question, status)
+            poll.options.append((index, value))
+
+    def add(
+        self,
+        guild_id: int,
+        poll_id: int,
+        question: str,
+        status: PollStatus = PollStatus.OPEN,
+        options: Optional[List[Tuple[int, str]]] = None,
+    ) -> IndexedPoll:
+        poll = IndexedPoll(poll_id, question, status, options)
+        self._guilds.setdefault(guild_id, {})[poll_id] = poll
+        self._guild_of[poll_id] = guild_id
+        return poll
+
+    def set_status(self, poll_id: int, status: PollStatus) -> None:
+        guild_id = self._guild_of.get(poll_id)
+        if guild_id is None:
+            return
+        if status is PollStatus.FINALIZED:
+            del self._guild_of[poll_id]
+            polls = self._guilds[guild_id]
+            del polls[poll_id]
+            if not polls:
+                del self._guilds[guild_id]
+        else:
+            self._guilds[guild_id][poll_id].status = status
+
+    def get(self, guild_id: int, poll_id: int) -> Optional[IndexedPoll]:
+        return self._guilds.get(guild_id, {}).get(poll_id)
+
+    def search(
+        self,
+        guild_id: int,
+        current: str,
+        statuses: Set[PollStatus],
+        limit: int = 25,
+    ) -> List[IndexedPoll]:
+        """Polls whose question starts with or contains ``current`` (or whose
+        id starts with it), prefix matches first and newest first within."""
+        needle = current.strip().casefold()
+        prefix, substring = [], []
+        # Polls are inserted in id order, so this walks newest first.
+        for poll in reversed(self._guilds.get(guild_id, {}).values()):
+            if poll.status not in statuses:
+                continue
+            if not needle or poll.folded.startswith(needle):
+                prefix.append(poll)
+                if len(prefix) == limit:
+                    break
+            elif len(substring) < limit and (
+                needle in poll.folded or str(poll.id).startswith(needle)
+            ):
+                substring.append(poll)
+        return (prefix + substring)[:limit]
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Tuple
+from util.models import PollStatus
+
+# Immutable snapshots filled straight from column projections. They are not
+# attached to a session, so nothing is tracked in the identity map and
+# nothing can lazy load.
+
+
+@dataclass(frozen=True, slots=True)
+class OpenPollView:
+    id: int
+    lockin_by: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class OptionView:
+    id: int
+    poll_id: int
+    index: int
+    value: str
+
+
+@dataclass(frozen=True, slots=True)
+class PollView:
+    id: int
+    status: PollStatus
+    question: str
+    reference: str
+    options: Tuple[OptionView, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class PositionView:
+    poll_id: int
+    question: str
+    reference: str
+    option_index: int
+    option_value: str
+    stake: float
@@ -0,0 +1,77 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class DeadlineScheduler:
+    """Min-heap of ``(deadline, key)`` pairs that sleeps until the earliest one.
+
+    Cancelled or rescheduled keys are dropped lazily when they reach the top of
+    the heap, so both operations are O(log n) amortised.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, Hashable]] = []
+        self._deadlines: Dict[Hashable, float] = {}
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: Hashable, deadline: datetime) -> None:
+        timestamp = deadline.timestamp()
+        self._deadlines[key] = timestamp
+        heapq.heappush(self._heap, (timestamp, key))
+        if self._heap[0][1] == key:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> None:
+        self._deadlines.pop(key, None)
+
+    def _prune(self) -> None:
+        while self._heap:
+            timestamp, key = self._heap[0]
+            if self._deadlines.get(key) == timestamp:
+                return
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: float) -> List[Hashable]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            timestamp, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == timestamp:
+                del self._deadlines[key]
+                due.append(key)
+        return due
+
+    async def wait_due(self, timeout: Optional[float] = None) -> List[Hashable]:
+        """Wait for the next deadline and return every key that is due.
+
+        Returns an empty list once ``timeout`` seconds pass without one.
+        """
+        give_up = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._prune()
+            self._wakeup.clear()
+            if self._heap:
+                wait = self._heap[0][0] - datetime.now().timestamp()
+                if wait <= 0:
+                    return self._pop_due(datetime.now().timestamp())
+            else:
+                wait = None
+
+            if give_up is not None:
+                remaining = give_up - time.monotonic()
+                if remaining <= 0:
+                    return []
+                wait = remaining if wait is None else min(wait, remaining)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,29 @@
+from typing import Optional
+from sqlalchemy import ColumnElement, Integer, literal
+
+
+class Shard:
+    """The slice of guilds this process owns, using Discord's shard formula."""
+
+    __slots__ = ("shard_id", "shard_count")
+
+    def __init__(
+        self, shard_id: Optional[int] = None, shard_count: Optional[int] = None
+    ):
+        self.shard_id = shard_id or 0
+        self.shard_count = shard_count or 1
+
+    def __repr__(self) -> str:
+        return f"Shard({self.shard_id}/{self.shard_count})"
+
+    @property
+    def is_sharded(self) -> bool:
+        return self.shard_count > 1
+
+    def where(self, guild_id: ColumnElement) -> Optional[ColumnElement]:
+        """SQL filter on a guild id column, or None when unsharded."""
+        if not self.is_sharded:
+            return None
+        # Postgres only defines bigint >> integer.
+        shifted = guild_id.op(">>")(literal(22, Integer))
+        return shifted % self.shard_count == self.shard_id